@@ -0,0 +1,153 @@
+import sys
+import getopt
+import os
+
+from components.setup import (load_values_from_json, load_arguments_from_tsv, load_labels_from_tsv,
+                              combine_columns, split_arguments)
+from components.models import (benchmark_cascade, benchmark_svm_compression, benchmark_windowed,
+                               benchmark_sharding, locate_svm_model_file)
+from components.benchmark import (benchmark_evaluation, benchmark_conversion)
+
+help_string = '\nUsage:  benchmark.py [OPTIONS]' \
+              '\n' \
+              '\nRun benchmarks on a synthetic corpus, or on the validation arguments with the trained models' \
+              '\n' \
+              '\nOptions:' \
+              '\n  -b, --benchmark string   Comma-separated list of benchmarks to run: "evaluation" compares evaluate.py' \
+              '\n                           against Evaluation.R, "conversion" compares the DataFrame to Dataset' \
+              '\n                           conversion against the former one, "cascade" compares the SVM-Bert' \
+              '\n                           cascade against Bert, "svm-compression" compares pruned sparse SVM' \
+              '\n                           weights against the trained ones, "windowed" compares Bert on overlapping' \
+              '\n                           windows against truncation, "sharding" compares Bert with 1 to N CPU' \
+              '\n                           worker processes (default "evaluation")' \
+              '\n  -d, --data-dir string    Directory with the argument files for benchmarks with trained models' \
+              '\n                           (default "/data/")' \
+              '\n  -h, --help               Display help text' \
+              '\n  -l, --levels string      Comma-separated list of taxonomy levels for benchmarks with trained models' \
+              '\n                           (default "1,2,3,4a,4b")' \
+              '\n  -m, --model-dir string   Directory with the trained models (default "/models/")' \
+              '\n  -n, --num-arguments int  Number of arguments in the synthetic corpus (default 2000)' \
+              '\n  -w, --workers string     Comma-separated list of worker counts for the "sharding" benchmark (default' \
+              '\n                           1, the powers of two below the available CPUs, and the available CPUs)'
+
+available_benchmarks = ["evaluation", "conversion", "cascade", "svm-compression", "windowed", "sharding"]
+# benchmarks on the validation arguments with the trained models
+model_benchmarks = ["cascade", "svm-compression", "windowed", "sharding"]
+
+
+def load_validation_arguments(data_dir, levels):
+    """Loads the values and, for each level, the validation arguments with their labels from `data_dir`"""
+    argument_filepath = os.path.join(data_dir, 'arguments.tsv')
+    value_json_filepath = os.path.join(data_dir, 'values.json')
+    for filepath in [argument_filepath, value_json_filepath] + [
+            os.path.join(data_dir, 'labels-level{}.tsv'.format(level)) for level in levels]:
+        if not os.path.isfile(filepath):
+            print('The required file "%s" is not present in the data directory' % os.path.basename(filepath))
+            sys.exit(2)
+
+    df_arguments = load_arguments_from_tsv(argument_filepath, default_usage='validation')
+    values = load_values_from_json(value_json_filepath)
+    df_valid_all = []
+    for level in levels:
+        df_labels = load_labels_from_tsv(os.path.join(data_dir, 'labels-level{}.tsv'.format(level)), values[level])
+        _, valid_arguments, _ = split_arguments(combine_columns(df_arguments, df_labels))
+        if len(valid_arguments) < 1:
+            print('There are no arguments listed for validation.')
+            sys.exit(2)
+        df_valid_all.append(valid_arguments)
+    return values, df_valid_all
+
+
+def main(argv):
+    # default values
+    benchmarks = ["evaluation"]
+    num_arguments = 2000
+    data_dir = '/data/'
+    levels = ["1", "2", "3", "4a", "4b"]
+    model_dir = '/models/'
+    worker_counts = None
+
+    try:
+        opts, args = getopt.gnu_getopt(argv, "b:d:hl:m:n:w:", ["benchmark=", "data-dir=", "help", "levels=",
+                                                              "model-dir=", "num-arguments=", "workers="])
+    except getopt.GetoptError:
+        print(help_string)
+        sys.exit(2)
+    for opt, arg in opts:
+        if opt in ('-h', '--help'):
+            print(help_string)
+            sys.exit()
+        elif opt in ('-b', '--benchmark'):
+            benchmarks = arg.split(",")
+            for benchmark in benchmarks:
+                if benchmark not in available_benchmarks:
+                    print('Unknown benchmark "%s"' % benchmark)
+                    sys.exit(2)
+        elif opt in ('-d', '--data-dir'):
+            data_dir = arg
+        elif opt in ('-l', '--levels'):
+            levels = arg.split(",")
+        elif opt in ('-m', '--model-dir'):
+            model_dir = arg
+        elif opt in ('-n', '--num-arguments'):
+            try:
+                num_arguments = int(arg)
+            except ValueError:
+                num_arguments = 0
+            if num_arguments < 1:
+                print('The number of arguments has to be a positive integer')
+                sys.exit(2)
+        elif opt in ('-w', '--workers'):
+            try:
+                worker_counts = [int(count) for count in arg.split(',')]
+            except ValueError:
+                worker_counts = [0]
+            if min(worker_counts) < 1:
+                print('The worker counts have to be positive integers')
+                sys.exit(2)
+
+    if any(benchmark in model_benchmarks for benchmark in benchmarks):
+        values, df_valid_all = load_validation_arguments(data_dir, levels)
+
+    for benchmark in benchmarks:
+        if benchmark == 'evaluation':
+            print("===> Benchmark: Evaluation...")
+            print(benchmark_evaluation(num_arguments=num_arguments))
+        elif benchmark == 'conversion':
+            print("===> Benchmark: Conversion...")
+            print(benchmark_conversion(num_arguments=num_arguments))
+        elif benchmark == 'cascade':
+            for i in range(len(levels)):
+                print("===> Benchmark: Cascade Level %s..." % levels[i])
+                for result in benchmark_cascade(
+                        df_valid_all[i], values[levels[i]],
+                        os.path.join(model_dir, 'bert_train_level{}'.format(levels[i])),
+                        os.path.join(model_dir, 'svm/svm_train_level{}_vectorizer.json'.format(levels[i])),
+                        locate_svm_model_file(model_dir, levels[i])):
+                    print(result)
+        elif benchmark == 'svm-compression':
+            for i in range(len(levels)):
+                print("===> Benchmark: SVM Compression Level %s..." % levels[i])
+                for result in benchmark_svm_compression(
+                        df_valid_all[i], values[levels[i]],
+                        os.path.join(model_dir, 'svm/svm_train_level{}_vectorizer.json'.format(levels[i])),
+                        os.path.join(model_dir, 'svm/svm_train_level{}_models.json'.format(levels[i]))):
+                    print(result)
+        elif benchmark == 'windowed':
+            for i in range(len(levels)):
+                print("===> Benchmark: Windowed Bert Level %s..." % levels[i])
+                for result in benchmark_windowed(
+                        df_valid_all[i], os.path.join(model_dir, 'bert_train_level{}'.format(levels[i])),
+                        values[levels[i]]):
+                    print(result)
+        elif benchmark == 'sharding':
+            for i in range(len(levels)):
+                print("===> Benchmark: Sharded Bert Level %s..." % levels[i])
+                for result in benchmark_sharding(
+                        df_valid_all[i], os.path.join(model_dir, 'bert_train_level{}'.format(levels[i])),
+                        values[levels[i]], worker_counts=worker_counts):
+                    print(result)
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
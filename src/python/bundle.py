@@ -0,0 +1,94 @@
+import sys
+import getopt
+import os
+
+from components.setup import (load_values_from_json)
+from components.models import (create_bundle, ModelBundle, locate_svm_model_file)
+
+help_string = '\nUsage:  bundle.py [OPTIONS]' \
+              '\n' \
+              '\nPack the trained Bert models, SVM weights, labels and the tokenizer into a single checksummed file' \
+              '\nthat predict.py loads through memory mapping' \
+              '\n' \
+              '\nOptions:' \
+              '\n  -c, --classifier string  Select classifiers to pack: "b" for Bert, "s" for SVM, or combination like' \
+              '\n                           "bs" (default "bs")' \
+              '\n  -d, --data-dir string    Directory with the "values.json" (default "/data/")' \
+              '\n  -h, --help               Display help text' \
+              '\n  -l, --levels string      Comma-separated list of taxonomy levels to pack the models of (default' \
+              '\n                           "1,2,3,4a,4b")' \
+              '\n  -m, --model-dir string   Directory with the trained models (default "/models/")' \
+              '\n  -o, --output string      File to write the bundle to (default "/models/models.bundle")'
+
+
+def main(argv):
+    # default values
+    include_bert = True
+    include_svm = True
+    data_dir = '/data/'
+    levels = ["1", "2", "3", "4a", "4b"]
+    model_dir = '/models/'
+    bundle_filepath = '/models/models.bundle'
+
+    try:
+        opts, args = getopt.gnu_getopt(argv, "c:d:hl:m:o:", ["classifier=", "data-dir=", "help", "levels=",
+                                                             "model-dir=", "output="])
+    except getopt.GetoptError:
+        print(help_string)
+        sys.exit(2)
+    for opt, arg in opts:
+        if opt in ('-h', '--help'):
+            print(help_string)
+            sys.exit()
+        elif opt in ('-c', '--classifier'):
+            include_bert = 'b' in arg.lower()
+            include_svm = 's' in arg.lower()
+            if not include_bert and not include_svm:
+                print('No classifiers selected')
+                sys.exit(2)
+        elif opt in ('-d', '--data-dir'):
+            data_dir = arg
+        elif opt in ('-l', '--levels'):
+            levels = arg.split(",")
+        elif opt in ('-m', '--model-dir'):
+            model_dir = arg
+        elif opt in ('-o', '--output'):
+            bundle_filepath = arg
+
+    values_filepath = os.path.join(data_dir, 'values.json')
+    if not os.path.isfile(values_filepath):
+        print('The required file "values.json" is not present in the data directory')
+        sys.exit(2)
+    values = load_values_from_json(values_filepath)
+
+    # check levels
+    for level in levels:
+        if level not in values:
+            print('Missing attribute "{}" in value.json'.format(level))
+            sys.exit(2)
+
+    # check model directory
+    if not os.path.isdir(model_dir):
+        print('The specified <model-dir> "%s" does not exist' % model_dir)
+        sys.exit(2)
+
+    for level in levels:
+        if include_bert and not os.path.exists(os.path.join(model_dir, 'bert_train_level{}'.format(level))):
+            print('Missing saved Bert model for level "{}"'.format(level))
+            sys.exit(2)
+        if include_svm and (
+                not os.path.exists(os.path.join(model_dir, 'svm/svm_train_level{}_vectorizer.json'.format(level)))
+                or not os.path.exists(locate_svm_model_file(model_dir, level))):
+            print('Missing saved SVM models for level "{}"'.format(level))
+            sys.exit(2)
+
+    print("===> Packing levels %s into %s..." % (','.join(levels), bundle_filepath))
+    print(create_bundle(model_dir, bundle_filepath, levels, values, include_bert=include_bert,
+                        include_svm=include_svm))
+
+    print("===> Verifying checksums...")
+    ModelBundle(bundle_filepath, verify=True)
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,15 @@
+"""
+    Collection of benchmarks on synthetic or given corpora
+
+    Functions
+    ---------
+    create_synthetic_corpus(data_dir, num_arguments, num_values=20, methods=('Bert', 'SVM')):
+        Write random corpus with noisy predictions
+    benchmark_evaluation(num_arguments=10000, rscript='Rscript'):
+        Compare run time of Python evaluation engine and Evaluation.R
+    benchmark_conversion(num_arguments=10000, level='2'):
+        Compare time and memory of DataFrame to Dataset conversions
+    """
+from .synthetic import (create_synthetic_corpus)
+from .evaluation import (benchmark_evaluation)
+from .conversion import (benchmark_conversion)
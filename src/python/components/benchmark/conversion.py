@@ -0,0 +1,65 @@
+import os
+import time
+import tempfile
+import tracemalloc
+
+import pyarrow as pa
+
+from datasets import (Dataset)
+
+from .synthetic import (create_synthetic_corpus)
+from ..setup import (load_arguments_from_tsv, load_labels_from_tsv, combine_columns)
+from ..models.bert import (build_dataset)
+
+
+def build_dataset_from_dict(dataframe, label_columns):
+    """Converts a DataFrame into a Dataset through Python lists and a per-row label map, the former `build_dataset`"""
+    dataset = Dataset.from_dict(dataframe[['Premise'] + label_columns].to_dict('list'))
+    return dataset.map(lambda x: {"labels": [int(x[c]) for c in label_columns]}, remove_columns=label_columns)
+
+
+def measure_conversion(build, dataframe, label_columns):
+    """Returns run time in seconds, peak Python memory and retained Arrow memory in bytes of one conversion"""
+    arrow_bytes = pa.total_allocated_bytes()
+    tracemalloc.start()
+    start = time.perf_counter()
+    dataset = build(dataframe, label_columns)
+    seconds = time.perf_counter() - start
+    _, peak_bytes = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    retained_arrow_bytes = pa.total_allocated_bytes() - arrow_bytes
+    del dataset
+    return seconds, peak_bytes, retained_arrow_bytes
+
+
+def benchmark_conversion(num_arguments=10000, level='2'):
+    """
+        Compares the direct Arrow conversion of `convert_to_dataset` against the former conversion through Python lists
+
+        Parameters
+        ----------
+        num_arguments : int, optional
+            The number of arguments in the synthetic corpus (default is 10000)
+        level : str, optional
+            The level whose labels are converted (default is "2")
+
+        Returns
+        -------
+        dict
+            run time, peak Python memory and retained Arrow memory of both conversions
+        """
+    with tempfile.TemporaryDirectory() as data_dir:
+        values = create_synthetic_corpus(data_dir, num_arguments)
+        df_arguments = load_arguments_from_tsv(os.path.join(data_dir, 'arguments.tsv'))
+        df_labels = load_labels_from_tsv(os.path.join(data_dir, 'labels-level{}.tsv'.format(level)), values[level])
+    dataframe = combine_columns(df_arguments, df_labels)
+    label_columns = values[level]
+
+    result = {'arguments': num_arguments, 'labels': len(label_columns)}
+    for name, build in [('from-dict', build_dataset_from_dict), ('arrow', build_dataset)]:
+        seconds, peak_bytes, arrow_bytes = measure_conversion(build, dataframe, label_columns)
+        result[name + '-seconds'] = round(seconds, 3)
+        result[name + '-peak-python-mb'] = round(peak_bytes / 1024 ** 2, 2)
+        result[name + '-arrow-mb'] = round(arrow_bytes / 1024 ** 2, 2)
+    result['speedup'] = round(result['from-dict-seconds'] / max(result['arrow-seconds'], 1e-9), 1)
+    return result
@@ -0,0 +1,80 @@
+import io
+import os
+import shutil
+import subprocess
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from .synthetic import (levels, create_synthetic_corpus)
+from ..setup import (load_arguments_from_tsv)
+from ..evaluation import (evaluate_predictions)
+
+# location of the R evaluation script in the repository
+r_script_filepath = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', '..', 'R', 'Evaluation.R')
+
+
+def run_python_evaluation(data_dir, prediction_filepath):
+    """Loads the files and evaluates the predictions like `evaluate.py`"""
+    df_arguments = load_arguments_from_tsv(os.path.join(data_dir, 'arguments.tsv'))
+    df_predictions = pd.read_csv(prediction_filepath, encoding='utf-8', sep='\t', header=0)
+    label_dataframes = {level: pd.read_csv(os.path.join(data_dir, 'labels-level{}.tsv'.format(level)),
+                                           encoding='utf-8', sep='\t', header=0) for level in levels}
+    return evaluate_predictions(df_arguments, df_predictions, label_dataframes)
+
+
+def run_r_evaluation(working_dir, prediction_filepath, rscript='Rscript'):
+    """Runs `Evaluation.R` on the data in "`working_dir`/webis-argvalues-22/" and parses its evaluation table"""
+    completed = subprocess.run([rscript, os.path.abspath(r_script_filepath), '--predictions', prediction_filepath],
+                               cwd=working_dir, capture_output=True, text=True, check=True)
+    table = '\n'.join(line for line in completed.stdout.splitlines() if not line.startswith('===>'))
+    return pd.read_csv(io.StringIO(table), sep='\t', header=0)
+
+
+def benchmark_evaluation(num_arguments=10000, rscript='Rscript'):
+    """
+        Compares the run time of the Python evaluation engine and `Evaluation.R` on a synthetic corpus
+
+        Parameters
+        ----------
+        num_arguments : int, optional
+            The number of arguments in the synthetic corpus (default is 10000)
+        rscript : str, optional
+            The Rscript executable; the R evaluation is skipped if it or the script is not available (default is
+            "Rscript")
+
+        Returns
+        -------
+        dict
+            the run times in seconds and, if R was run, the maximal absolute difference between the scores of both
+        """
+    with tempfile.TemporaryDirectory() as working_dir:
+        # Evaluation.R always reads from "./webis-argvalues-22/" of its working directory
+        data_dir = os.path.join(working_dir, 'webis-argvalues-22')
+        create_synthetic_corpus(data_dir, num_arguments)
+        prediction_filepath = os.path.join(data_dir, 'predictions.tsv')
+
+        start = time.perf_counter()
+        df_python = run_python_evaluation(data_dir, prediction_filepath)
+        result = {'arguments': num_arguments, 'python-seconds': round(time.perf_counter() - start, 3)}
+
+        if shutil.which(rscript) is None or not os.path.isfile(r_script_filepath):
+            print('Rscript or Evaluation.R not available, skipping the R evaluation')
+            return result
+
+        start = time.perf_counter()
+        df_r = run_r_evaluation(working_dir, prediction_filepath, rscript=rscript)
+        result['r-seconds'] = round(time.perf_counter() - start, 3)
+        result['speedup'] = round(result['r-seconds'] / max(result['python-seconds'], 1e-9), 1)
+
+        keys = ['Method', 'Test dataset', 'Level', 'Label']
+        df_r['Level'] = df_r['Level'].astype(str)
+        df_joined = df_python.merge(df_r, on=keys, how='outer', suffixes=(' (python)', ' (r)'), indicator=True)
+        result['unmatched-rows'] = int((df_joined['_merge'] != 'both').sum())
+        scores = ['Precision', 'Recall', 'F1', 'Accuracy']
+        differences = np.abs(df_joined[[s + ' (python)' for s in scores]].to_numpy(dtype=float) -
+                             df_joined[[s + ' (r)' for s in scores]].to_numpy(dtype=float))
+        result['max-score-difference'] = float(np.nanmax(differences)) if differences.size > 0 else 0.0
+        return result
@@ -0,0 +1,78 @@
+import os
+import json
+
+import numpy as np
+import pandas as pd
+
+from ..setup import (load_values_from_json, write_tsv_dataframe)
+
+levels = ["1", "2", "3", "4a", "4b"]
+
+
+def create_synthetic_corpus(data_dir, num_arguments, num_values=20, methods=('Bert', 'SVM'), label_rate=0.2,
+                            error_rate=0.2, seed=0):
+    """
+        Writes a random corpus in the format of the webis-argvalues-22 dataset, together with noisy predictions
+
+        Parameters
+        ----------
+        data_dir : str
+            The directory to write "arguments.tsv", "values.json", "labels-level*.tsv" and "predictions.tsv" into
+        num_arguments : int
+            The number of arguments
+        num_values : int, optional
+            The number of level 1 values (default is 20)
+        methods : tuple[str], optional
+            The methods to write predictions for (default is ('Bert', 'SVM'))
+        label_rate : float, optional
+            The probability of each label to be assigned to an argument (default is 0.2)
+        error_rate : float, optional
+            The probability of each predicted label to differ from the assigned label (default is 0.2)
+        seed : int, optional
+            The seed of the random generator (default is 0)
+
+        Returns
+        -------
+        dict
+            the labels per level
+        """
+    rng = np.random.default_rng(seed)
+    if not os.path.exists(data_dir):
+        os.makedirs(data_dir)
+
+    values_json = {'values': [{'name': 'Value {}'.format(i), 'level2': 'Category {}'.format(i // 2),
+                               'level3': ['Group {}'.format(i % 4)], 'level4a': ['Type {}'.format(i % 2)],
+                               'level4b': ['Kind {}'.format(i % 3)]} for i in range(num_values)]}
+    values_filepath = os.path.join(data_dir, 'values.json')
+    with open(values_filepath, 'w') as f:
+        json.dump(values_json, f)
+    values = load_values_from_json(values_filepath)
+
+    vocabulary = np.asarray(['word{}'.format(i) for i in range(2000)])
+    premise_lengths = rng.integers(5, 60, size=num_arguments)
+    argument_ids = ['A{:07d}'.format(i) for i in range(num_arguments)]
+    df_arguments = pd.DataFrame({
+        'Argument ID': argument_ids,
+        'Conclusion': ['conclusion {}'.format(i % 100) for i in range(num_arguments)],
+        'Stance': rng.choice(['in favor of', 'against'], size=num_arguments),
+        'Premise': [' '.join(rng.choice(vocabulary, size=length)) for length in premise_lengths],
+        'Part': rng.choice(['part-a', 'part-b', 'part-c'], size=num_arguments),
+        'Usage': rng.choice(['train', 'validation', 'test'], size=num_arguments, p=[0.6, 0.2, 0.2])
+    })
+    write_tsv_dataframe(os.path.join(data_dir, 'arguments.tsv'), df_arguments)
+
+    method_columns = {method: [pd.DataFrame({'Argument ID': argument_ids, 'Method': method})] for method in methods}
+    for level in levels:
+        labels = values[level]
+        assigned = (rng.random((num_arguments, len(labels))) < label_rate).astype(int)
+        df_labels = pd.DataFrame(assigned, columns=labels)
+        df_labels.insert(0, 'Argument ID', argument_ids)
+        write_tsv_dataframe(os.path.join(data_dir, 'labels-level{}.tsv'.format(level)), df_labels)
+
+        for method in methods:
+            flipped = rng.random(assigned.shape) < error_rate
+            method_columns[method].append(pd.DataFrame(np.where(flipped, 1 - assigned, assigned), columns=labels))
+    df_predictions = pd.concat([pd.concat(columns, axis=1) for columns in method_columns.values()], ignore_index=True)
+    write_tsv_dataframe(os.path.join(data_dir, 'predictions.tsv'), df_predictions)
+
+    return values
@@ -0,0 +1,15 @@
+"""
+    Collection of functions to evaluate predictions, equivalent to `src/R/Evaluation.R`
+
+    Functions
+    ---------
+    evaluate_predictions(df_arguments, df_predictions, label_dataframes, absent_labels=False):
+        Calculate label-wise and mean Precision, Recall, F1-score and Accuracy
+    filter_evaluation_data(df_arguments, df_predictions, label_dataframes):
+        Restrict arguments, predictions and labels to the predicted test arguments
+    count_outcomes(df_predictions, df_labels, label_names):
+        Count label-wise outcomes per method and test dataset
+    compute_scores(counts, label_names):
+        Compute label-wise and mean scores from counted outcomes
+    """
+from .metrics import (evaluate_predictions, filter_evaluation_data, count_outcomes, compute_scores)
@@ -0,0 +1,207 @@
+import numpy as np
+import pandas as pd
+
+# columns of the evaluation table
+evaluation_columns = ['Method', 'Test dataset', 'Level', 'Label', 'Precision', 'Recall', 'F1', 'Accuracy']
+
+
+def filter_evaluation_data(df_arguments, df_predictions, label_dataframes):
+    """
+        Restricts arguments, predictions and labels to the test arguments that were predicted
+
+        Parameters
+        ----------
+        df_arguments : pd.DataFrame
+            The arguments, optionally with the columns "Usage" and "Part"
+        df_predictions : pd.DataFrame
+            The predictions, optionally with the column "Method"
+        label_dataframes : dict[str, pd.DataFrame]
+            The label annotations per level
+
+        Returns
+        -------
+        tuple(pd.DataFrame, pd.DataFrame, dict[str, pd.DataFrame])
+            the filtered arguments, predictions and labels, where levels without a single predicted label are dropped
+        """
+    predicted_ids = pd.Index(df_predictions['Argument ID'].unique())
+    df_arguments = df_arguments.loc[df_arguments['Argument ID'].isin(predicted_ids)]
+    if 'Usage' in df_arguments.columns.values:
+        df_arguments = df_arguments.loc[df_arguments['Usage'] == 'test']
+    argument_ids = pd.Index(df_arguments['Argument ID'].unique())
+    df_predictions = df_predictions.loc[df_predictions['Argument ID'].isin(argument_ids)]
+
+    filtered_labels = {}
+    for level, df_labels in label_dataframes.items():
+        df_labels = df_labels.loc[df_labels['Argument ID'].isin(argument_ids),
+                                  [c for c in df_labels.columns.values if c in df_predictions.columns.values]]
+        if len(df_labels.columns) > 1:
+            filtered_labels[level] = df_labels
+
+    return df_arguments, df_predictions, filtered_labels
+
+
+def evaluate_predictions(df_arguments, df_predictions, label_dataframes, absent_labels=False):
+    """
+        Calculates label-wise and mean Precision, Recall, F1-score and Accuracy per method, test dataset and level
+
+        Predictions and labels are joined on "Argument ID", and all counts of one level are computed at once for all
+        methods and test datasets ("Part" of the arguments).
+
+        Parameters
+        ----------
+        df_arguments : pd.DataFrame
+            The arguments, optionally with the columns "Usage" and "Part"
+        df_predictions : pd.DataFrame
+            The predictions, optionally with the column "Method"
+        label_dataframes : dict[str, pd.DataFrame]
+            The label annotations per level, in the order of the levels
+        absent_labels : bool, optional
+            Whether to include labels that never occur in a test dataset (default is False)
+
+        Returns
+        -------
+        pd.DataFrame
+            the evaluation table, without the columns "Method" and "Test dataset" if the predictions have no methods or
+            the arguments have no parts
+        """
+    df_arguments, df_predictions, label_dataframes = filter_evaluation_data(df_arguments, df_predictions,
+                                                                            label_dataframes)
+    if len(label_dataframes) == 0:
+        return pd.DataFrame(columns=evaluation_columns)
+
+    has_parts = 'Part' in df_arguments.columns.values
+    has_methods = 'Method' in df_predictions.columns.values
+
+    df_predictions = df_predictions.copy()
+    if has_parts:
+        dataset_names = df_arguments['Part'].unique().tolist()
+        parts = df_arguments.drop_duplicates(subset='Argument ID').set_index('Argument ID')['Part']
+        df_predictions['Test dataset'] = df_predictions['Argument ID'].map(parts)
+    else:
+        dataset_names = ['none']
+        df_predictions['Test dataset'] = 'none'
+    if not has_methods:
+        df_predictions['Method'] = 'Bert'
+    method_names = sorted(df_predictions['Method'].unique().tolist())
+
+    # labels that never occur in the predicted arguments of a test dataset
+    absent = {dataset: set() for dataset in dataset_names}
+    if not absent_labels:
+        dataset_of_argument = df_predictions.drop_duplicates(subset='Argument ID').set_index('Argument ID')['Test dataset']
+        for df_labels in label_dataframes.values():
+            label_names = [c for c in df_labels.columns.values if c != 'Argument ID']
+            label_sums = (df_labels[label_names].groupby(df_labels['Argument ID'].map(dataset_of_argument)).sum())
+            for dataset, row in label_sums.iterrows():
+                absent[dataset].update(row.index[row.values == 0])
+
+    results = []
+    for level, df_labels in label_dataframes.items():
+        label_names = [c for c in df_labels.columns.values if c != 'Argument ID']
+        counts = count_outcomes(df_predictions, df_labels, label_names)
+        for (method, dataset), group_counts in counts.iterrows():
+            present = [label_name for label_name in label_names if label_name not in absent.get(dataset, ())]
+            if len(present) == 0:
+                continue
+            df_result = compute_scores(group_counts, present)
+            df_result.insert(0, 'Level', level)
+            df_result.insert(0, 'Test dataset', dataset)
+            df_result.insert(0, 'Method', method)
+            results.append(df_result)
+
+    if len(results) == 0:
+        return pd.DataFrame(columns=evaluation_columns)
+    df_evaluation = pd.concat(results, ignore_index=True)[evaluation_columns]
+
+    # order by method, then test dataset, then level
+    df_evaluation['Method'] = pd.Categorical(df_evaluation['Method'], categories=method_names, ordered=True)
+    df_evaluation['Test dataset'] = pd.Categorical(df_evaluation['Test dataset'], categories=dataset_names, ordered=True)
+    df_evaluation['Level'] = pd.Categorical(df_evaluation['Level'], categories=list(label_dataframes.keys()),
+                                            ordered=True)
+    df_evaluation = df_evaluation.sort_values(['Method', 'Test dataset', 'Level'], kind='stable')
+    df_evaluation = df_evaluation.astype({'Method': str, 'Test dataset': str, 'Level': str}).reset_index(drop=True)
+
+    for column in ['Precision', 'Recall', 'F1', 'Accuracy']:
+        df_evaluation[column] = df_evaluation[column].round(2)
+    if not has_parts:
+        df_evaluation = df_evaluation.drop(columns=['Test dataset'])
+    if not has_methods:
+        df_evaluation = df_evaluation.drop(columns=['Method'])
+    return df_evaluation
+
+
+def count_outcomes(df_predictions, df_labels, label_names):
+    """
+        Counts per method and test dataset the true positives, actual positives, predicted positives and correct
+        predictions of each label
+
+        Parameters
+        ----------
+        df_predictions : pd.DataFrame
+            The predictions with the columns "Argument ID", "Method" and "Test dataset"
+        df_labels : pd.DataFrame
+            The label annotations of one level
+        label_names : list[str]
+            The labels to count
+
+        Returns
+        -------
+        pd.DataFrame
+            one row per method and test dataset (the index) with the column ("n", ""), and for each label the columns
+            ("tp", label), ("true", label), ("pred", label) and ("correct", label)
+        """
+    df_joined = df_predictions[['Argument ID', 'Method', 'Test dataset'] + label_names].merge(
+        df_labels[['Argument ID'] + label_names], on='Argument ID', how='inner', suffixes=('', ' (true)'))
+
+    y_pred = df_joined[label_names].to_numpy() == 1
+    y_true = df_joined[[label_name + ' (true)' for label_name in label_names]].to_numpy() == 1
+    outcomes = np.hstack([y_pred & y_true, y_true, y_pred, y_pred == y_true]).astype(np.int64)
+
+    columns = pd.MultiIndex.from_product([['tp', 'true', 'pred', 'correct'], label_names])
+    df_outcomes = pd.DataFrame(outcomes, columns=columns)
+    df_outcomes[('n', '')] = 1
+    keys = [df_joined['Method'].to_numpy(), df_joined['Test dataset'].to_numpy()]
+    df_counts = df_outcomes.groupby(keys, sort=False).sum()
+    df_counts.index.names = ['Method', 'Test dataset']
+    return df_counts
+
+
+def compute_scores(counts, label_names):
+    """
+        Computes label-wise and mean scores from the counts of one method and test dataset
+
+        Parameters
+        ----------
+        counts : pd.Series
+            One row of `count_outcomes`
+        label_names : list[str]
+            The labels to score
+
+        Returns
+        -------
+        pd.DataFrame
+            the columns "Label", "Precision", "Recall", "F1" and "Accuracy", with the means in the last row "Mean"
+        """
+    tp = counts['tp'][label_names].to_numpy(dtype=float)
+    true = counts['true'][label_names].to_numpy(dtype=float)
+    pred = counts['pred'][label_names].to_numpy(dtype=float)
+    correct = counts['correct'][label_names].to_numpy(dtype=float)
+    n = float(counts[('n', '')])
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        recall = np.where(true == 0, 0.0, tp / true)
+        precision = np.where(pred == 0, 0.0, tp / pred)
+        f1 = np.where(precision + recall == 0, 0.0, 2 * precision * recall / (precision + recall))
+        accuracy = correct / n
+
+        mean_precision = precision.mean()
+        mean_recall = recall.mean()
+        # the mean F1-score is the harmonic mean of mean precision and mean recall, like in Metrics.R
+        mean_f1 = 2 * mean_precision * mean_recall / (mean_precision + mean_recall)
+
+    return pd.DataFrame({
+        'Label': list(label_names) + ['Mean'],
+        'Precision': np.append(precision, mean_precision),
+        'Recall': np.append(recall, mean_recall),
+        'F1': np.append(f1, mean_f1),
+        'Accuracy': np.append(accuracy, accuracy.mean())
+    })
@@ -1,22 +1,102 @@
 """
     Collection of machine learning functions regarding the models:
     Bert,
+    Distilled student of Bert,
+    Linear heads on frozen Bert embeddings,
     Support Vector Machine (SVM),
     1-Baseline
 
     Functions
     ---------
-    train_bert_model(train_dataframe, model_dir, labels, test_dataframe=None, num_train_epochs=20):
+    train_bert_model(train_dataframe, model_dir, labels, test_dataframe=None, num_train_epochs=20, batch_size=8):
         Train Bert model
-    predict_bert_model(dataframe, model_dir, labels):
+    predict_bert_model(dataframe, model_dir, labels, model=None, batch_size=8):
         Predict with Bert model
+    predict_bert_logits(dataframe, model_dir, labels, model=None, batch_size=8):
+        Compute raw output logits of Bert model
+    predict_bert_model_windowed(dataframe, model_dir, labels, window_size=128, window_overlap=32, batch_size=32):
+        Predict with Bert model on overlapping windows of the premises instead of truncating them
+    predict_bert_logits_windowed(dataframe, model_dir, labels, window_size=128, window_overlap=32, batch_size=32):
+        Compute logits of Bert model pooled over overlapping windows of the premises
+    benchmark_windowed(dataframe, model_dir, labels, window_sizes=(64, 128, 256), window_overlap=32):
+        Compare cost and predictions of windowed Bert prediction and truncation
+    predict_bert_model_sharded(dataframe, model_dir, labels, num_workers, threads_per_worker=None, batch_size=8):
+        Predict with Bert model in multiple CPU processes
+    benchmark_sharding(dataframe, model_dir, labels, worker_counts=None, batch_size=8):
+        Compare throughput and scaling of sharded Bert prediction for different numbers of worker processes
+    predict_bert_pipelined(chunks, model_dirs, labels_per_level, write_chunk, batch_size=8, queue_size=2):
+        Predict chunks with the Bert models of all levels, overlapping reading, loading, inference and writing
+    train_student_model(train_dataframe, teacher_dir, model_dir, labels, unlabelled_dataframe=None):
+        Train compact student model on the soft labels of a Bert model
+    predict_student_model(dataframe, model_dir, labels):
+        Predict with student model
+    benchmark_student_model(dataframe, teacher_dir, model_dir, labels):
+        Compare throughput and F1-scores of student model and Bert teacher
+    update_embedding_store(dataframe, store_dir, encoder='bert-base-uncased'):
+        Encode and store the frozen Bert embeddings of new arguments
+    train_linear_heads(train_dataframe, store, labels, model_file, test_dataframe=None):
+        Train multi-label linear head on stored embeddings
+    predict_linear_heads(dataframe, store, labels, model_file):
+        Predict with linear head on stored embeddings
     train_svm(train_dataframe, labels, vectorizer_file, model_file, test_dataframe=None):
         Train Support Vector Machines (SVMs)
     predict_svm(dataframe, labels, vectorizer_file, model_file):
         Predict with Support Vector Machines (SVMs)
+    decision_svm(dataframe, labels, vectorizer_file, model_file):
+        Compute decision values of Support Vector Machines (SVMs)
+    predict_svm_decision(decision_values, labels):
+        Predict from decision values of Support Vector Machines (SVMs)
+    compress_svm(vectorizer_file, model_file, compressed_model_file, threshold=0.0, top_k=None, dtype='float32'):
+        Prune Support Vector Machines (SVMs) and save them as sparse weights
+    benchmark_svm_compression(dataframe, labels, vectorizer_file, model_file, settings=None):
+        Compare size, throughput and F1-scores of pruned and trained Support Vector Machines (SVMs)
+    locate_svm_model_file(model_dir, level):
+        Find the compressed or else the serialized Support Vector Machines (SVMs) of a level
+    predict_cascade(dataframe, labels, bert_dir, vectorizer_file, model_file, band=0.5, min_uncertain=3):
+        Predict with SVMs and with Bert for the uncertain labels of arguments with several uncertain SVM decisions
+    benchmark_cascade(dataframe, labels, bert_dir, vectorizer_file, model_file, bands=(0.25, 0.5, 1.0),
+                      min_uncertain_counts=(1, 3, 5)):
+        Compare throughput and F1-scores of cascade and Bert
+    available_cpus():
+        Count the CPUs usable by this process within its affinity and container CPU quota
+    apply_thread_config(config):
+        Set torch intra-op and inter-op threads, BLAS threads and tokenizer parallelism
+    load_thread_config(config_file):
+        Load thread configuration
+    save_thread_config(config, config_file):
+        Save thread configuration
+    tune_thread_config(dataframe, model_dir, labels, thread_counts=None, batch_sizes=(8, 16, 32), num_samples=64):
+        Time thread and batch size combinations for Bert prediction and apply the fastest
     predict_one_baseline(dataframe, labels):
         Predict with 1-Baseline model
+    create_bundle(model_dir, bundle_file, levels, values, include_bert=True, include_svm=True):
+        Pack the Bert models, SVM weights, labels and tokenizer of all levels into a single checksummed file
+
+    Classes
+    -------
+    EmbeddingStore:
+        Memory-mapped store of pooled premise embeddings keyed by Argument ID
+    ModelRegistry:
+        In-process cache of loaded models with memory-bounded LRU eviction
+    ModelBundle:
+        Memory-mapped model bundle with Bert models, SVM weights, labels and tokenizer of all levels
+
+    Attributes
+    ----------
+    model_registry : ModelRegistry
+        Cache of the Bert models, tokenizers, student models and SVM weights loaded for prediction
     """
-from .bert import (train_bert_model, predict_bert_model)
-from .svm import (train_svm, predict_svm)
+from .registry import (ModelRegistry, model_registry)
+from .bert import (train_bert_model, predict_bert_model, predict_bert_logits)
+from .threads import (available_cpus, apply_thread_config, load_thread_config, save_thread_config,
+                      tune_thread_config)
+from .windowed import (predict_bert_model_windowed, predict_bert_logits_windowed, benchmark_windowed)
+from .sharding import (predict_bert_model_sharded, benchmark_sharding)
+from .pipeline import (predict_bert_pipelined)
+from .distill import (train_student_model, predict_student_model, benchmark_student_model)
+from .embeddings import (EmbeddingStore, update_embedding_store, train_linear_heads, predict_linear_heads)
+from .svm import (train_svm, predict_svm, decision_svm, predict_svm_decision, compress_svm,
+                  benchmark_svm_compression, locate_svm_model_file)
+from .cascade import (predict_cascade, benchmark_cascade)
 from .one_baseline import (predict_one_baseline)
+from .bundle import (create_bundle, ModelBundle)
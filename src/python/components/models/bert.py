@@ -1,12 +1,18 @@
+import tempfile
+
 import torch
 
 from datasets import (Dataset, DatasetDict, load_dataset)
+from datasets.table import (InMemoryTable)
 from transformers import (AutoTokenizer, AutoModelForSequenceClassification,
                           PreTrainedModel, BertModel, BertForSequenceClassification,
                           TrainingArguments, Trainer)
 from sklearn.metrics import f1_score
 
 import numpy as np
+import pyarrow as pa
+
+from .registry import (model_registry, module_size)
 
 
 def accuracy_thresh(y_pred, y_true, thresh=0.5, sigmoid=True):
@@ -68,7 +74,35 @@ class MultiLabelTrainer(Trainer):
 
 def tokenize_and_encode(examples):
     """Tokenizes each arguments "Premise" """
-    return tokenizer(examples['Premise'], truncation=True)
+    return get_tokenizer()(examples['Premise'], truncation=True)
+
+
+def build_dataset(dataframe, label_columns):
+    """
+        Converts the "Premise" and label columns of a DataFrame directly into an Arrow-backed Dataset
+
+        The labels of all arguments are taken from the label columns in one step and stored as a single list array
+        column "labels", without intermediate Python objects per argument.
+
+        Parameters
+        ----------
+        dataframe : pd.DataFrame
+            The arguments to convert
+        label_columns : list[str]
+            The label columns, in the order of the resulting labels
+
+        Returns
+        -------
+        Dataset
+            a `Dataset` with the columns "Premise" and "labels"
+        """
+    num_labels = len(label_columns)
+    label_values = dataframe[label_columns].to_numpy(dtype=np.int64).reshape(-1)
+    label_offsets = np.arange(len(dataframe) + 1, dtype=np.int32) * num_labels
+    labels_array = pa.ListArray.from_arrays(pa.array(label_offsets), pa.array(label_values))
+
+    table = pa.table({'Premise': pa.array(dataframe['Premise'], type=pa.string()), 'labels': labels_array})
+    return Dataset(InMemoryTable(table))
 
 
 def convert_to_dataset(train_dataframe, test_dataframe, labels):
@@ -90,29 +124,15 @@ def convert_to_dataset(train_dataframe, test_dataframe, labels):
             a `DatasetDict` with attributes "train" and "test" for the listed arguments,
             a `list` with the contained labels
         """
-    column_intersect = [x for x in (['Premise'] + labels) if x in train_dataframe.columns.values]
-
-    train_dataset = Dataset.from_dict((train_dataframe[column_intersect]).to_dict('list'))
-    test_dataset = Dataset.from_dict((test_dataframe[column_intersect]).to_dict('list'))
+    label_columns = [x for x in labels if x in train_dataframe.columns.values]
 
     ds = DatasetDict()
-    ds['train'] = train_dataset
-    ds['test'] = test_dataset
+    ds['train'] = build_dataset(train_dataframe, label_columns)
+    ds['test'] = build_dataset(test_dataframe, label_columns)
 
-    ds = ds.map(lambda x: {"labels": [int(x[c]) for c in ds['train'].column_names if
-                                      c not in ['Argument ID', 'Conclusion', 'Stance', 'Premise', 'Part']]})
+    ds_enc = ds.map(tokenize_and_encode, batched=True, remove_columns=['Premise'])
 
-    cols = ds['train'].column_names
-    cols.remove('labels')
-
-    ds_enc = ds.map(tokenize_and_encode, batched=True, remove_columns=cols)
-
-    cols.remove('Premise')
-
-    return ds_enc, cols
-
-
-tokenizer = AutoTokenizer.from_pretrained("bert-base-uncased")
+    return ds_enc, label_columns
 
 
 def load_model_from_data_dir(model_dir, num_labels):
@@ -123,51 +143,114 @@ def load_model_from_data_dir(model_dir, num_labels):
     return model
 
 
-def predict_bert_model(dataframe, model_dir, labels):
+def load_cached_model(model_dir, num_labels):
+    """Returns the Bert model from specified directory for inference, loading it only if it is not in the registry"""
+    model = model_registry.get('bert-{}'.format(num_labels), model_dir,
+                               lambda: load_model_from_data_dir(model_dir, num_labels=num_labels), module_size)
+    model.eval()
+    return model
+
+
+def load_cached_tokenizer(name_or_dir):
+    """Returns the tokenizer of the specified name or directory, loading it only if it is not in the registry"""
+    return model_registry.get('tokenizer', name_or_dir, lambda: AutoTokenizer.from_pretrained(name_or_dir),
+                              lambda x: 0)
+
+
+# tokenizer of all Bert models, loaded on first use unless it was set from a model bundle
+_tokenizer = None
+
+
+def get_tokenizer():
+    """Returns the tokenizer of the Bert models, loading the one of "bert-base-uncased" on first use"""
+    global _tokenizer
+    if _tokenizer is None:
+        _tokenizer = load_cached_tokenizer("bert-base-uncased")
+    return _tokenizer
+
+
+def set_tokenizer(tokenizer):
+    """Sets the tokenizer of the Bert models, e.g. to the one stored in a model bundle"""
+    global _tokenizer
+    _tokenizer = tokenizer
+
+
+def predict_bert_logits(dataframe, model_dir, labels, model=None, batch_size=8):
     """
-        Classifies each argument using the Bert model stored in `model_dir`
+        Computes the raw output logits of the Bert model stored in `model_dir` for each argument
 
         Parameters
         ----------
         dataframe: pd.Dataframe
             The arguments to be classified
         model_dir: str
-            The directory of the pre-trained Bert model to use
+            The directory of the pre-trained Bert model to use, or None if `model` is given
         labels: list[str]
             The labels to predict
+        model: PreTrainedModel, optional
+            An already loaded model to use instead of the one in `model_dir` (default is None)
+        batch_size: int, optional
+            The number of arguments per forward pass (default is 8)
 
         Returns
         -------
         np.ndarray
-            numpy nd-array with the predictions given by the model
+            numpy nd-array of shape (n_arguments, n_labels) with the logits given by the model
         """
     ds, no_labels = convert_to_dataset(dataframe, dataframe, labels)
     num_labels = len(labels)
     ds = ds.remove_columns(['labels'])
 
-    batch_size = 8
-    args = TrainingArguments(
-        output_dir=model_dir,
-        do_train=False,
-        do_eval=False,
-        do_predict=True,
-        per_device_eval_batch_size=batch_size
-    )
+    if model is None:
+        model = load_cached_model(model_dir, num_labels=num_labels)
 
-    model = load_model_from_data_dir(model_dir, num_labels=num_labels)
+    # the trainer needs an output directory, which prediction leaves empty
+    with tempfile.TemporaryDirectory() as output_dir:
+        args = TrainingArguments(
+            output_dir=output_dir,
+            do_train=False,
+            do_eval=False,
+            do_predict=True,
+            per_device_eval_batch_size=batch_size
+        )
 
-    multi_trainer = MultiLabelTrainer(
-        model,
-        args,
-        tokenizer=tokenizer
-    )
+        multi_trainer = MultiLabelTrainer(
+            model,
+            args,
+            tokenizer=get_tokenizer()
+        )
 
-    prediction = 1 * (multi_trainer.predict(ds['train']).predictions > 0.5)
+        return multi_trainer.predict(ds['train']).predictions
+
+
+def predict_bert_model(dataframe, model_dir, labels, model=None, batch_size=8):
+    """
+        Classifies each argument using the Bert model stored in `model_dir`
+
+        Parameters
+        ----------
+        dataframe: pd.Dataframe
+            The arguments to be classified
+        model_dir: str
+            The directory of the pre-trained Bert model to use, or None if `model` is given
+        labels: list[str]
+            The labels to predict
+        model: PreTrainedModel, optional
+            An already loaded model to use instead of the one in `model_dir` (default is None)
+        batch_size: int, optional
+            The number of arguments per forward pass (default is 8)
+
+        Returns
+        -------
+        np.ndarray
+            numpy nd-array with the predictions given by the model
+        """
+    prediction = 1 * (predict_bert_logits(dataframe, model_dir, labels, model=model, batch_size=batch_size) > 0.5)
 
     return prediction
 
 
-def train_bert_model(train_dataframe, model_dir, labels, test_dataframe=None, num_train_epochs=20):
+def train_bert_model(train_dataframe, model_dir, labels, test_dataframe=None, num_train_epochs=20, batch_size=8):
     """
         Trains Bert model with the arguments in `train_dataframe`
 
@@ -183,6 +266,8 @@ def train_bert_model(train_dataframe, model_dir, labels, test_dataframe=None, nu
             The validation arguments (default is None)
         num_train_epochs: int, optional
             The number of training epochs (default is 20)
+        batch_size: int, optional
+            The number of arguments per training and evaluation step (default is 8)
 
         Returns
         -------
@@ -195,8 +280,6 @@ def train_bert_model(train_dataframe, model_dir, labels, test_dataframe=None, nu
         test_dataframe = train_dataframe
     ds, labels = convert_to_dataset(train_dataframe, test_dataframe, labels)
 
-    batch_size = 8
-
     args = TrainingArguments(
         output_dir=model_dir,
         evaluation_strategy="steps",
@@ -217,7 +300,7 @@ def train_bert_model(train_dataframe, model_dir, labels, test_dataframe=None, nu
         train_dataset=ds["train"],
         eval_dataset=ds["test"],
         compute_metrics=lambda x: compute_metrics(x, labels),
-        tokenizer=tokenizer
+        tokenizer=get_tokenizer()
     )
 
     multi_trainer.train()
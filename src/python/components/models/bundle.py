@@ -0,0 +1,278 @@
+import os
+import json
+import mmap
+import struct
+import hashlib
+
+import torch
+import numpy as np
+
+from scipy import sparse
+
+from tokenizers import Tokenizer
+from transformers import (AutoConfig, AutoModelForSequenceClassification, PreTrainedTokenizerFast)
+from transformers.modeling_utils import no_init_weights
+
+from .bert import (get_tokenizer)
+from .svm import (SvmWeights, load_svm_weights, locate_svm_model_file)
+
+# file layout: magic, offset and length of the JSON manifest, then the aligned blobs, then the manifest
+bundle_magic = b'ARGVBNDL'
+bundle_version = 1
+header_format = '<8sQQ'
+blob_alignment = 64
+
+
+def _align(offset):
+    """Returns the next multiple of the blob alignment"""
+    return (offset + blob_alignment - 1) // blob_alignment * blob_alignment
+
+
+def _checksum(data):
+    """Returns the SHA-256 hex digest of the bytes"""
+    return hashlib.sha256(data).hexdigest()
+
+
+class _BundleWriter:
+    """Writes aligned blobs into the bundle file, storing blobs with identical content only once"""
+
+    def __init__(self, f):
+        self.f = f
+        self.blobs = {}
+        self.num_arrays = 0
+        self.deduplicated_bytes = 0
+
+    def add(self, array):
+        """Writes the array unless an identical one was written before and returns its blob id"""
+        array = np.ascontiguousarray(array)
+        data = array.tobytes()
+        blob_id = _checksum(data + str((array.dtype.str, array.shape)).encode('utf-8'))
+        self.num_arrays += 1
+        if blob_id in self.blobs:
+            self.deduplicated_bytes += len(data)
+            return blob_id
+
+        offset = _align(self.f.tell())
+        self.f.write(b'\0' * (offset - self.f.tell()))
+        self.f.write(data)
+        self.blobs[blob_id] = {'offset': offset, 'length': len(data), 'dtype': array.dtype.str,
+                               'shape': list(array.shape), 'sha256': _checksum(data)}
+        return blob_id
+
+
+def create_bundle(model_dir, bundle_file, levels, values, include_bert=True, include_svm=True):
+    """
+        Packs the Bert models, SVM weights, label lists and the tokenizer of all levels into a single file
+
+        Tensors with byte-identical content are stored only once. The separately fine-tuned Bert models of the levels
+        differ in all their weights, so this saves only identical tensors like buffers, not the encoders. Every stored
+        tensor carries a SHA-256 checksum.
+
+        Parameters
+        ----------
+        model_dir : str
+            The directory with the trained models
+        bundle_file : str
+            The file to write the bundle to
+        levels : list[str]
+            The levels to pack
+        values : dict[str, list[str]]
+            The labels per level
+        include_bert : bool, optional
+            Whether to pack the Bert models (default is True)
+        include_svm : bool, optional
+            Whether to pack the SVM weights (default is True)
+
+        Returns
+        -------
+        dict
+            the number of packed and of stored tensors, the bytes saved by deduplication and the size of the bundle
+        """
+    tokenizer = get_tokenizer()
+    manifest = {'version': bundle_version, 'levels': {},
+                'tokenizer': {'json': tokenizer.backend_tokenizer.to_str(),
+                              'special_tokens': tokenizer.special_tokens_map,
+                              'model_max_length': tokenizer.model_max_length}}
+
+    with open(bundle_file, 'wb') as f:
+        f.write(struct.pack(header_format, bundle_magic, 0, 0))
+        writer = _BundleWriter(f)
+
+        for level in levels:
+            level_manifest = {'labels': list(values[level])}
+            if include_bert:
+                model = AutoModelForSequenceClassification.from_pretrained(
+                    os.path.join(model_dir, 'bert_train_level{}'.format(level)), num_labels=len(values[level]))
+                level_manifest['bert'] = {
+                    'config': model.config.to_dict(),
+                    'tensors': {name: writer.add(tensor.detach().cpu().numpy())
+                                for name, tensor in model.state_dict().items()}}
+                del model
+            if include_svm:
+                svm_weights = load_svm_weights(
+                    os.path.join(model_dir, 'svm/svm_train_level{}_vectorizer.json'.format(level)),
+                    locate_svm_model_file(model_dir, level))
+                level_manifest['svm'] = {
+                    'vocabulary': {term: int(index) for term, index in svm_weights.vectorizer.vocabulary.items()},
+                    'labels': svm_weights.labels,
+                    'idf': writer.add(svm_weights.vectorizer.idf_),
+                    'intercept': writer.add(svm_weights.intercept)}
+                if sparse.issparse(svm_weights.coef):
+                    # compressed weights stay sparse
+                    level_manifest['svm']['coef'] = {'data': writer.add(svm_weights.coef.data),
+                                                     'indices': writer.add(svm_weights.coef.indices),
+                                                     'indptr': writer.add(svm_weights.coef.indptr),
+                                                     'shape': list(svm_weights.coef.shape)}
+                else:
+                    level_manifest['svm']['coef'] = writer.add(svm_weights.coef)
+            manifest['levels'][level] = level_manifest
+
+        manifest['blobs'] = writer.blobs
+        manifest_data = json.dumps(manifest).encode('utf-8')
+        manifest_offset = f.tell()
+        f.write(manifest_data)
+        f.seek(0)
+        f.write(struct.pack(header_format, bundle_magic, manifest_offset, len(manifest_data)))
+
+    return {'tensors': writer.num_arrays, 'stored-tensors': len(writer.blobs),
+            'deduplicated-mb': round(writer.deduplicated_bytes / 1024 ** 2, 2),
+            'bundle-mb': round(os.path.getsize(bundle_file) / 1024 ** 2, 2)}
+
+
+class ModelBundle:
+    """
+        A memory-mapped model bundle written by `create_bundle`
+
+        The bundle file is opened once and mapped copy-on-write, so that the loaded models use the mapped memory
+        directly instead of copies.
+
+        ...
+        Attributes
+        ----------
+        bundle_file : str
+            The path of the bundle
+        levels : list[str]
+            The packed levels
+
+        Methods
+        -------
+        labels(level):
+            Returns the labels of a level
+        has_bert(level), has_svm(level):
+            Returns whether the Bert model or the SVM weights of a level are packed
+        bert_model(level):
+            Returns the Bert model of a level
+        svm_weights(level):
+            Returns the SVM weights of a level
+        tokenizer():
+            Returns the packed tokenizer
+        verify():
+            Checks the checksums of all blobs
+    """
+
+    def __init__(self, bundle_file, verify=False):
+        """
+            Maps the bundle file and reads its manifest
+
+            Parameters
+            ----------
+            bundle_file : str
+                The path of the bundle
+            verify : bool, optional
+                Whether to check the checksums of all blobs right away (default is False)
+
+            Raises
+            ------
+            ValueError
+                if the file is no model bundle or a checksum does not match
+        """
+        self.bundle_file = bundle_file
+        with open(bundle_file, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY)
+
+        magic, manifest_offset, manifest_length = struct.unpack_from(header_format, self._mmap, 0)
+        if magic != bundle_magic:
+            raise ValueError('The file "%s" is no model bundle' % bundle_file)
+        self._manifest = json.loads(self._mmap[manifest_offset:manifest_offset + manifest_length].decode('utf-8'))
+        if self._manifest['version'] != bundle_version:
+            raise ValueError('The model bundle "%s" has the unsupported version %s'
+                             % (bundle_file, self._manifest['version']))
+        self.levels = list(self._manifest['levels'].keys())
+        self._models = {}
+        if verify:
+            self.verify()
+
+    def _array(self, blob_id):
+        """Returns the blob as array backed by the mapped file"""
+        blob = self._manifest['blobs'][blob_id]
+        dtype = np.dtype(blob['dtype'])
+        array = np.frombuffer(self._mmap, dtype=dtype, count=blob['length'] // dtype.itemsize, offset=blob['offset'])
+        return array.reshape(blob['shape'])
+
+    def verify(self):
+        """Checks the checksums of all blobs and raises a `ValueError` on the first mismatch"""
+        for blob_id, blob in self._manifest['blobs'].items():
+            if _checksum(self._mmap[blob['offset']:blob['offset'] + blob['length']]) != blob['sha256']:
+                raise ValueError('The checksum of blob %s in model bundle "%s" does not match'
+                                 % (blob_id, self.bundle_file))
+
+    def labels(self, level):
+        """Returns the labels of a level"""
+        return self._manifest['levels'][level]['labels']
+
+    def has_bert(self, level):
+        """Returns whether the Bert model of a level is packed"""
+        return level in self._manifest['levels'] and 'bert' in self._manifest['levels'][level]
+
+    def has_svm(self, level):
+        """Returns whether the SVM weights of a level are packed"""
+        return level in self._manifest['levels'] and 'svm' in self._manifest['levels'][level]
+
+    def bert_model(self, level):
+        """Returns the Bert model of a level, whose tensors are backed by the mapped file"""
+        if level in self._models:
+            return self._models[level]
+
+        bert_manifest = self._manifest['levels'][level]['bert']
+        config = AutoConfig.for_model(**bert_manifest['config'])
+        with no_init_weights():
+            model = AutoModelForSequenceClassification.from_config(config)
+
+        parameters = dict(model.named_parameters())
+        buffers = dict(model.named_buffers())
+        missing = set(parameters.keys()) - set(bert_manifest['tensors'].keys())
+        if len(missing) > 0:
+            raise ValueError('The model bundle "%s" lacks the tensors %s of level %s'
+                             % (self.bundle_file, sorted(missing), level))
+        for name, blob_id in bert_manifest['tensors'].items():
+            tensor = torch.from_numpy(self._array(blob_id))
+            if name in parameters:
+                parameters[name].data = tensor
+            elif name in buffers:
+                module_name, _, buffer_name = name.rpartition('.')
+                model.get_submodule(module_name)._buffers[buffer_name] = tensor
+
+        if torch.cuda.is_available():
+            model = model.to('cuda')
+        model.eval()
+        self._models[level] = model
+        return model
+
+    def svm_weights(self, level):
+        """Returns the SVM weights of a level, whose matrices are backed by the mapped file"""
+        svm_manifest = self._manifest['levels'][level]['svm']
+        if isinstance(svm_manifest['coef'], dict):
+            coef = sparse.csr_matrix((self._array(svm_manifest['coef']['data']),
+                                      self._array(svm_manifest['coef']['indices']),
+                                      self._array(svm_manifest['coef']['indptr'])), shape=svm_manifest['coef']['shape'])
+        else:
+            coef = self._array(svm_manifest['coef'])
+        return SvmWeights(svm_manifest['vocabulary'], self._array(svm_manifest['idf']), svm_manifest['labels'], coef,
+                          self._array(svm_manifest['intercept']))
+
+    def tokenizer(self):
+        """Returns the packed tokenizer"""
+        tokenizer_manifest = self._manifest['tokenizer']
+        return PreTrainedTokenizerFast(tokenizer_object=Tokenizer.from_str(tokenizer_manifest['json']),
+                                       model_max_length=tokenizer_manifest['model_max_length'],
+                                       **tokenizer_manifest['special_tokens'])
@@ -0,0 +1,109 @@
+import time
+
+import numpy as np
+import pandas as pd
+
+from sklearn.metrics import f1_score
+
+from .bert import (predict_bert_model)
+from .svm import (decision_svm, predict_svm_decision, decision_threshold)
+
+
+def predict_cascade(dataframe, labels, bert_dir, vectorizer_file, model_file, band=0.5, min_uncertain=3):
+    """
+        Classifies each argument with the SVMs, and only the uncertain labels of uncertain arguments with Bert
+
+        A label is uncertain if its decision value lies within `band` of the SVM threshold 0.5, and an argument is
+        uncertain if at least `min_uncertain` of its labels are. Bert replaces only the uncertain labels of the
+        uncertain arguments, the confident SVM decisions are kept.
+
+        Parameters
+        ----------
+        dataframe : pd.DataFrame
+            The arguments to be classified
+        labels : list[str]
+            The listing of all labels
+        bert_dir : str
+            The directory of the pre-trained Bert model to use
+        vectorizer_file : str
+            The file containing the fitted data from the TfidfVectorizer
+        model_file : str
+            The file containing the serialized SVM models
+        band : float, optional
+            The distance to the SVM threshold within which decisions are uncertain (default is 0.5)
+        min_uncertain : int, optional
+            The number of uncertain labels from which an argument is passed on to Bert (default is 3)
+
+        Returns
+        -------
+        tuple(pd.DataFrame, float)
+            the predictions given by the cascade,
+            the fraction of arguments classified with Bert
+        """
+    decision_values = decision_svm(dataframe, labels, vectorizer_file, model_file)
+    prediction = predict_svm_decision(decision_values, labels).to_numpy()
+
+    uncertain_labels = np.abs(decision_values - decision_threshold) < band
+    uncertain = uncertain_labels.sum(axis=1) >= min_uncertain
+    if uncertain.any():
+        bert_prediction = predict_bert_model(dataframe.loc[uncertain].reset_index(drop=True), bert_dir, labels)
+        prediction[uncertain] = np.where(uncertain_labels[uncertain], bert_prediction, prediction[uncertain])
+
+    bert_fraction = float(uncertain.mean()) if len(uncertain) > 0 else 0.0
+    return pd.DataFrame(prediction, columns=labels), bert_fraction
+
+
+def benchmark_cascade(dataframe, labels, bert_dir, vectorizer_file, model_file, bands=(0.25, 0.5, 1.0),
+                      min_uncertain_counts=(1, 3, 5)):
+    """
+        Compares throughput and F1-score of the cascade for different uncertainty settings against Bert alone
+
+        Parameters
+        ----------
+        dataframe : pd.DataFrame
+            The validation arguments with their true labels
+        labels : list[str]
+            The listing of all labels
+        bert_dir : str
+            The directory of the pre-trained Bert model to use
+        vectorizer_file : str
+            The file containing the fitted data from the TfidfVectorizer
+        model_file : str
+            The file containing the serialized SVM models
+        bands : tuple[float], optional
+            The uncertainty bands to compare (default is (0.25, 0.5, 1.0))
+        min_uncertain_counts : tuple[int], optional
+            The numbers of uncertain labels from which arguments are passed on to Bert to compare (default is
+            (1, 3, 5))
+
+        Returns
+        -------
+        list[dict]
+            the macro F1-score and throughput of Bert alone, and for each combination of band and number of uncertain
+            labels the fraction of arguments sent to Bert, the throughput gain over Bert alone and the change in macro
+            F1-score
+        """
+    y_true = dataframe[labels].to_numpy(dtype=int)
+
+    # load the models once, so that all timings below compare the inference only
+    predict_cascade(dataframe.head(1), labels, bert_dir, vectorizer_file, model_file, band=np.inf, min_uncertain=0)
+
+    start = time.perf_counter()
+    bert_prediction = predict_bert_model(dataframe, bert_dir, labels)
+    bert_seconds = time.perf_counter() - start
+    bert_f1 = f1_score(y_true, bert_prediction, average='macro', zero_division=0)
+    results = [{'band': 'bert-only', 'min-uncertain': None, 'bert-fraction': 1.0,
+                'arguments-per-second': round(len(dataframe) / bert_seconds, 2), 'f1-score': round(bert_f1, 3)}]
+
+    for band in bands:
+        for min_uncertain in min_uncertain_counts:
+            start = time.perf_counter()
+            prediction, bert_fraction = predict_cascade(dataframe, labels, bert_dir, vectorizer_file, model_file,
+                                                        band=band, min_uncertain=min_uncertain)
+            seconds = time.perf_counter() - start
+            f1 = f1_score(y_true, prediction.to_numpy(), average='macro', zero_division=0)
+            results.append({'band': band, 'min-uncertain': min_uncertain, 'bert-fraction': round(bert_fraction, 3),
+                            'arguments-per-second': round(len(dataframe) / seconds, 2),
+                            'throughput-gain': round(bert_seconds / seconds, 2), 'f1-score': round(f1, 3),
+                            'f1-change': round(f1 - bert_f1, 3)})
+    return results
@@ -0,0 +1,274 @@
+import os
+import json
+import time
+
+import torch
+import numpy as np
+import pandas as pd
+
+from sklearn.metrics import f1_score
+
+from .bert import (get_tokenizer, predict_bert_logits, predict_bert_model)
+from .registry import (model_registry, module_size)
+
+# constant file names
+student_weights_file = 'student.pt'
+student_config_file = 'config.json'
+
+
+class StudentModel(torch.nn.Module):
+    """
+        A compact embedding-bag classifier distilled from a Bert teacher
+
+        ...
+        Attributes
+        ----------
+        embedding : torch.nn.EmbeddingBag
+            The averaged word-piece embeddings of a premise
+        hidden : torch.nn.Linear
+            The hidden projection layer
+        output : torch.nn.Linear
+            The output layer with one logit per label
+
+        Methods
+        -------
+        forward(input_ids, offsets):
+            Computes the logits for a flattened batch of word-piece ids
+    """
+
+    def __init__(self, vocab_size, num_labels, embedding_dim=256, hidden_dim=256):
+        """
+            Constructs all necessary attributes for the StudentModel object
+
+            Parameters
+            ----------
+            vocab_size : int
+                The size of the word-piece vocabulary
+            num_labels : int
+                The number of labels to predict
+            embedding_dim : int, optional
+                The dimension of the word-piece embeddings (default is 256)
+            hidden_dim : int, optional
+                The dimension of the hidden layer (default is 256)
+        """
+        super().__init__()
+        self.embedding = torch.nn.EmbeddingBag(vocab_size, embedding_dim, mode='mean')
+        self.hidden = torch.nn.Linear(embedding_dim, hidden_dim)
+        self.output = torch.nn.Linear(hidden_dim, num_labels)
+
+    def forward(self, input_ids, offsets):
+        """Computes the logits for a flattened batch of word-piece ids"""
+        hidden = torch.relu(self.hidden(self.embedding(input_ids, offsets)))
+        return self.output(hidden)
+
+
+def encode_premises(dataframe, max_length=512):
+    """Tokenizes each arguments "Premise" into a list of word-piece ids without special tokens"""
+    tokenizer = get_tokenizer()
+    encoded = tokenizer(dataframe['Premise'].tolist(), add_special_tokens=False, truncation=True, max_length=max_length)
+    # an empty bag would yield a zero embedding, so every premise keeps at least the unknown token
+    return [ids if len(ids) > 0 else [tokenizer.unk_token_id] for ids in encoded['input_ids']]
+
+
+def collate_premises(encoded_premises):
+    """Flattens a list of word-piece id lists into the `input_ids` and `offsets` tensors of an `EmbeddingBag`"""
+    lengths = [len(ids) for ids in encoded_premises]
+    offsets = torch.tensor([0] + lengths[:-1], dtype=torch.long).cumsum(dim=0)
+    input_ids = torch.tensor([i for ids in encoded_premises for i in ids], dtype=torch.long)
+    return input_ids, offsets
+
+
+def load_student_model(model_dir):
+    """Loads the student model and its configuration from the specified directory"""
+    with open(os.path.join(model_dir, student_config_file), 'r') as f:
+        config = json.load(f)
+    model = StudentModel(config['vocab_size'], config['num_labels'],
+                         embedding_dim=config['embedding_dim'], hidden_dim=config['hidden_dim'])
+    model.load_state_dict(torch.load(os.path.join(model_dir, student_weights_file), map_location='cpu'))
+    model.eval()
+    return model, config
+
+
+def load_cached_student_model(model_dir):
+    """Returns the student model and its configuration, loading them only if they are not in the registry"""
+    return model_registry.get('student', model_dir, lambda: load_student_model(model_dir), lambda x: module_size(x[0]))
+
+
+def predict_student_logits(dataframe, model_dir, labels, batch_size=256):
+    """
+        Computes the raw output logits of the student model stored in `model_dir` for each argument
+
+        Parameters
+        ----------
+        dataframe : pd.DataFrame
+            The arguments to be classified
+        model_dir : str
+            The directory of the trained student model
+        labels : list[str]
+            The labels to predict
+        batch_size : int, optional
+            The number of arguments per forward pass (default is 256)
+
+        Returns
+        -------
+        np.ndarray
+            numpy nd-array of shape (n_arguments, n_labels) with the logits given by the model
+        """
+    model, config = load_cached_student_model(model_dir)
+    if config['labels'] != list(labels):
+        raise ValueError('The student model in "%s" was trained for different labels' % model_dir)
+
+    encoded_premises = encode_premises(dataframe, max_length=config['max_length'])
+    logits = []
+    with torch.no_grad():
+        for start in range(0, len(encoded_premises), batch_size):
+            input_ids, offsets = collate_premises(encoded_premises[start:start + batch_size])
+            logits.append(model(input_ids, offsets).numpy())
+
+    if len(logits) == 0:
+        return np.zeros((0, len(labels)), dtype=np.float32)
+    return np.concatenate(logits)
+
+
+def predict_student_model(dataframe, model_dir, labels):
+    """
+        Classifies each argument using the student model stored in `model_dir`
+
+        Parameters
+        ----------
+        dataframe : pd.DataFrame
+            The arguments to be classified
+        model_dir : str
+            The directory of the trained student model
+        labels : list[str]
+            The labels to predict
+
+        Returns
+        -------
+        np.ndarray
+            numpy nd-array with the predictions given by the model
+        """
+    # same decision rule as `predict_bert_model`, as the student is trained to reproduce the teacher's logits
+    return 1 * (predict_student_logits(dataframe, model_dir, labels) > 0.5)
+
+
+def train_student_model(train_dataframe, teacher_dir, model_dir, labels, unlabelled_dataframe=None,
+                        num_train_epochs=10, batch_size=64, learning_rate=1e-3, temperature=1.0, alpha=0.5,
+                        max_length=512):
+    """
+        Trains a compact student model on the soft labels of the Bert model stored in `teacher_dir`
+
+        Parameters
+        ----------
+        train_dataframe : pd.DataFrame
+            The labelled arguments to be trained on
+        teacher_dir : str
+            The directory of the trained Bert teacher model
+        model_dir : str
+            The directory for storing the trained student model
+        labels : list[str]
+            The labels in the training data
+        unlabelled_dataframe : pd.DataFrame, optional
+            Additional arguments without labels, which are trained on the teacher's soft labels only (default is None)
+        num_train_epochs : int, optional
+            The number of training epochs (default is 10)
+        batch_size : int, optional
+            The number of arguments per training step (default is 64)
+        learning_rate : float, optional
+            The learning rate of the Adam optimizer (default is 1e-3)
+        temperature : float, optional
+            The temperature used to soften the teacher's logits (default is 1.0)
+        alpha : float, optional
+            The weight of the soft label loss against the loss on the true labels (default is 0.5)
+        max_length : int, optional
+            The maximum number of word-pieces per premise (default is 512)
+        """
+    train_dataframe = train_dataframe[['Premise'] + [x for x in labels if x in train_dataframe.columns.values]]
+    num_labelled = len(train_dataframe)
+    if unlabelled_dataframe is not None and len(unlabelled_dataframe) > 0:
+        train_dataframe = pd.concat([train_dataframe, unlabelled_dataframe[['Premise']]], ignore_index=True)
+
+    # soft labels given by the teacher
+    teacher_logits = predict_bert_logits(train_dataframe[['Premise']], teacher_dir, labels)
+    soft_labels = torch.sigmoid(torch.from_numpy(np.asarray(teacher_logits, dtype=np.float32)) / temperature)
+
+    # true labels, masked out for unlabelled arguments
+    hard_labels = torch.zeros_like(soft_labels)
+    hard_mask = torch.zeros(len(train_dataframe), dtype=torch.bool)
+    if set(labels).issubset(set(train_dataframe.columns.values)):
+        hard_labels[:num_labelled] = torch.from_numpy(
+            train_dataframe[labels].iloc[:num_labelled].to_numpy(dtype=np.float32))
+        hard_mask[:num_labelled] = True
+
+    encoded_premises = encode_premises(train_dataframe, max_length=max_length)
+
+    vocab_size = get_tokenizer().vocab_size
+    model = StudentModel(vocab_size, len(labels))
+    optimizer = torch.optim.Adam(model.parameters(), lr=learning_rate)
+    loss_fct = torch.nn.BCEWithLogitsLoss(reduction='none')
+
+    model.train()
+    for _ in range(num_train_epochs):
+        permutation = torch.randperm(len(encoded_premises)).tolist()
+        for start in range(0, len(permutation), batch_size):
+            batch = permutation[start:start + batch_size]
+            input_ids, offsets = collate_premises([encoded_premises[i] for i in batch])
+            logits = model(input_ids, offsets)
+
+            soft_loss = loss_fct(logits / temperature, soft_labels[batch]).mean(dim=1) * (temperature ** 2)
+            hard_loss = loss_fct(logits, hard_labels[batch]).mean(dim=1)
+            loss = torch.where(hard_mask[batch], alpha * soft_loss + (1 - alpha) * hard_loss, soft_loss).mean()
+
+            optimizer.zero_grad()
+            loss.backward()
+            optimizer.step()
+
+    if not os.path.exists(model_dir):
+        os.makedirs(model_dir)
+    torch.save(model.state_dict(), os.path.join(model_dir, student_weights_file))
+    config = {'vocab_size': vocab_size, 'num_labels': len(labels), 'embedding_dim': model.embedding.embedding_dim,
+              'hidden_dim': model.hidden.out_features, 'max_length': max_length, 'labels': list(labels)}
+    with open(os.path.join(model_dir, student_config_file), 'w') as f:
+        json.dump(config, f)
+
+
+def benchmark_student_model(dataframe, teacher_dir, model_dir, labels):
+    """
+        Compares throughput and F1-scores of the student model in `model_dir` against its teacher in `teacher_dir`
+
+        Parameters
+        ----------
+        dataframe : pd.DataFrame
+            The arguments to benchmark on, optionally with the true labels
+        teacher_dir : str
+            The directory of the trained Bert teacher model
+        model_dir : str
+            The directory of the trained student model
+        labels : list[str]
+            The labels to predict
+
+        Returns
+        -------
+        dict
+            the throughput in arguments per second of teacher and student, the macro F1-score of the student against
+            the teacher's predictions, and the macro F1-scores of both against the true labels if available
+        """
+    start = time.perf_counter()
+    teacher_prediction = predict_bert_model(dataframe, teacher_dir, labels)
+    teacher_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    student_prediction = predict_student_model(dataframe, model_dir, labels)
+    student_time = time.perf_counter() - start
+
+    result = {
+        'teacher-arguments-per-second': round(len(dataframe) / teacher_time, 2),
+        'student-arguments-per-second': round(len(dataframe) / student_time, 2),
+        'f1-score-against-teacher': round(f1_score(teacher_prediction, student_prediction, average='macro',
+                                                   zero_division=0), 2)
+    }
+    if set(labels).issubset(set(dataframe.columns.values)):
+        y_true = dataframe[labels].to_numpy(dtype=int)
+        result['teacher-f1-score'] = round(f1_score(y_true, teacher_prediction, average='macro', zero_division=0), 2)
+        result['student-f1-score'] = round(f1_score(y_true, student_prediction, average='macro', zero_division=0), 2)
+    return result
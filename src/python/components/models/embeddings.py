@@ -0,0 +1,324 @@
+import os
+import json
+import hashlib
+
+import torch
+import numpy as np
+import pandas as pd
+
+from transformers import (AutoModel, DataCollatorWithPadding)
+from sklearn.metrics import f1_score
+
+from .bert import (load_cached_tokenizer)
+from .registry import (model_registry, module_size)
+
+# constant file names and label values
+embeddings_file = 'embeddings.npy'
+index_file = 'index.json'
+encoder_label = 'encoder'
+ids_label = 'ids'
+rows_label = 'rows'
+hashes_label = 'hashes'
+size_label = 'size'
+weight_label = 'weight'
+bias_label = 'bias'
+labels_label = 'labels'
+
+# the embedding matrix is preallocated, so that most additions write into free rows instead of rewriting it
+initial_capacity = 1024
+growth_factor = 2
+
+
+def premise_hash(premise):
+    """Returns a short fingerprint of the premise text, used to detect changed arguments"""
+    return hashlib.sha1(premise.encode('utf-8')).hexdigest()[:16]
+
+
+class EmbeddingStore:
+    """
+        A memory-mapped store of pooled premise embeddings keyed by Argument ID
+
+        ...
+        Attributes
+        ----------
+        store_dir : str
+            The directory holding the embedding matrix and its index
+        encoder : str
+            The name or directory of the Bert encoder the embeddings were computed with
+        embeddings : np.memmap
+            The read-only embedding matrix of shape (capacity, hidden_size), of which the first rows are in use
+
+        Methods
+        -------
+        missing(dataframe):
+            Returns the arguments that are not stored or whose premise changed
+        get(argument_ids):
+            Returns the embeddings of the given arguments
+        add(dataframe, embeddings):
+            Stores embeddings for the given arguments
+    """
+
+    def __init__(self, store_dir, encoder='bert-base-uncased'):
+        """
+            Opens the store in `store_dir` or prepares an empty one
+
+            Parameters
+            ----------
+            store_dir : str
+                The directory holding the embedding matrix and its index
+            encoder : str, optional
+                The Bert encoder to compute embeddings with (default is "bert-base-uncased")
+
+            Raises
+            ------
+            ValueError
+                if the existing store was computed with a different encoder
+        """
+        self.store_dir = store_dir
+        self.encoder = encoder
+        self.embeddings = None
+        self._rows = {}
+        self._hashes = {}
+        self._size = 0
+
+        index_filepath = os.path.join(store_dir, index_file)
+        if os.path.isfile(index_filepath):
+            with open(index_filepath, 'r') as f:
+                index_json = json.load(f)
+            if index_json[encoder_label] != encoder:
+                raise ValueError('The embedding store "%s" was computed with encoder "%s"'
+                                 % (store_dir, index_json[encoder_label]))
+            for argument_id, row, hash_value in zip(index_json[ids_label], index_json[rows_label],
+                                                    index_json[hashes_label]):
+                self._rows[argument_id] = row
+                self._hashes[argument_id] = hash_value
+            self.embeddings = np.load(os.path.join(store_dir, embeddings_file), mmap_mode='r')
+            # stores written before the preallocation use all rows
+            self._size = index_json.get(size_label, self.embeddings.shape[0])
+
+    def __len__(self):
+        return len(self._rows)
+
+    def missing(self, dataframe):
+        """Returns the arguments of `dataframe` that are not stored or whose premise changed"""
+        mask = [self._hashes.get(argument_id) != premise_hash(premise)
+                for argument_id, premise in zip(dataframe['Argument ID'], dataframe['Premise'])]
+        return dataframe[mask]
+
+    def get(self, argument_ids):
+        """Returns the embeddings of the given arguments as array of shape (n_arguments, hidden_size)"""
+        return np.asarray(self.embeddings[[self._rows[argument_id] for argument_id in argument_ids]])
+
+    def add(self, dataframe, embeddings):
+        """
+            Stores the embeddings for the arguments in `dataframe`, replacing those of already stored arguments
+
+            The embeddings are written into the free rows of the memory-mapped matrix. Only if these do not suffice,
+            the matrix is rewritten with `growth_factor` times the needed rows, leaving out the rows of replaced
+            embeddings.
+        """
+        if len(dataframe) == 0:
+            return
+        if not os.path.exists(self.store_dir):
+            os.makedirs(self.store_dir)
+
+        embeddings_filepath = os.path.join(self.store_dir, embeddings_file)
+        argument_ids = list(dataframe['Argument ID'])
+        capacity = 0 if self.embeddings is None else self.embeddings.shape[0]
+        rewrite = self._size + len(embeddings) > capacity
+        if rewrite:
+            # compact the matrix to the rows still in use
+            replaced_ids = set(argument_ids)
+            kept_ids = [argument_id for argument_id in self._rows.keys() if argument_id not in replaced_ids]
+            tmp_filepath = embeddings_filepath + '.tmp'
+            matrix = np.lib.format.open_memmap(
+                tmp_filepath, mode='w+', dtype=np.float32,
+                shape=(max(growth_factor * (len(kept_ids) + len(embeddings)), initial_capacity), embeddings.shape[1]))
+            for start in range(0, len(kept_ids), initial_capacity):
+                block_ids = kept_ids[start:start + initial_capacity]
+                matrix[start:start + len(block_ids)] = self.embeddings[[self._rows[argument_id]
+                                                                        for argument_id in block_ids]]
+            self._rows = {argument_id: row for row, argument_id in enumerate(kept_ids)}
+            self._size = len(kept_ids)
+        else:
+            matrix = np.lib.format.open_memmap(embeddings_filepath, mode='r+')
+        matrix[self._size:self._size + len(embeddings)] = embeddings
+        matrix.flush()
+        del matrix
+        self.embeddings = None
+        if rewrite:
+            os.replace(tmp_filepath, embeddings_filepath)
+
+        for offset, (argument_id, premise) in enumerate(zip(argument_ids, dataframe['Premise'])):
+            self._rows[argument_id] = self._size + offset
+            self._hashes[argument_id] = premise_hash(premise)
+        self._size += len(embeddings)
+        self._hashes = {argument_id: self._hashes[argument_id] for argument_id in self._rows.keys()}
+
+        ids = list(self._rows.keys())
+        with open(os.path.join(self.store_dir, index_file), 'w') as f:
+            json.dump({encoder_label: self.encoder, size_label: self._size, ids_label: ids,
+                       rows_label: [self._rows[argument_id] for argument_id in ids],
+                       hashes_label: [self._hashes[argument_id] for argument_id in ids]}, f)
+        self.embeddings = np.load(embeddings_filepath, mmap_mode='r')
+
+
+def load_encoder(encoder):
+    """Loads the Bert encoder without classification head and converts to CUDA model if available"""
+    model = AutoModel.from_pretrained(encoder)
+    if torch.cuda.is_available():
+        model = model.to('cuda')
+    model.eval()
+    return model
+
+
+def encode_premises_with_bert(dataframe, encoder='bert-base-uncased', batch_size=32):
+    """
+        Computes the mean-pooled last hidden states of the frozen Bert `encoder` for each arguments "Premise"
+
+        Parameters
+        ----------
+        dataframe : pd.DataFrame
+            The arguments to encode
+        encoder : str, optional
+            The name or directory of the Bert encoder (default is "bert-base-uncased")
+        batch_size : int, optional
+            The number of premises per forward pass (default is 32)
+
+        Returns
+        -------
+        np.ndarray
+            numpy nd-array of shape (n_arguments, hidden_size) with the pooled embeddings
+        """
+    encoder_tokenizer = load_cached_tokenizer(encoder)
+    model = model_registry.get('encoder', encoder, lambda: load_encoder(encoder), module_size)
+    device = model.device
+    collator = DataCollatorWithPadding(encoder_tokenizer)
+
+    premises = dataframe['Premise'].tolist()
+    pooled = []
+    with torch.no_grad():
+        for start in range(0, len(premises), batch_size):
+            encoded = encoder_tokenizer(premises[start:start + batch_size], truncation=True)
+            batch = collator([{key: encoded[key][i] for key in encoded.keys()} for i in range(len(encoded['input_ids']))])
+            batch = {key: value.to(device) for key, value in batch.items()}
+            hidden_states = model(**batch).last_hidden_state
+            mask = batch['attention_mask'].unsqueeze(-1).to(hidden_states.dtype)
+            pooled.append(((hidden_states * mask).sum(dim=1) / mask.sum(dim=1)).cpu().numpy())
+
+    if len(pooled) == 0:
+        return np.zeros((0, model.config.hidden_size), dtype=np.float32)
+    return np.concatenate(pooled).astype(np.float32)
+
+
+def update_embedding_store(dataframe, store_dir, encoder='bert-base-uncased'):
+    """
+        Encodes all arguments in `dataframe` that are not yet stored in `store_dir`
+
+        Parameters
+        ----------
+        dataframe : pd.DataFrame
+            The arguments to be stored
+        store_dir : str
+            The directory of the embedding store
+        encoder : str, optional
+            The name or directory of the Bert encoder (default is "bert-base-uncased")
+
+        Returns
+        -------
+        EmbeddingStore
+            the store containing embeddings for all arguments of `dataframe`
+        """
+    store = EmbeddingStore(store_dir, encoder=encoder)
+    df_missing = store.missing(dataframe.drop_duplicates(subset='Argument ID', keep='last'))
+    if len(df_missing) > 0:
+        store.add(df_missing, encode_premises_with_bert(df_missing, encoder=encoder))
+    return store
+
+
+def train_linear_heads(train_dataframe, store, labels, model_file, test_dataframe=None, num_train_epochs=300,
+                       learning_rate=1e-2, weight_decay=1e-4):
+    """
+        Trains a multi-label linear head on the stored embeddings of the arguments in `train_dataframe`
+
+        Parameters
+        ----------
+        train_dataframe : pd.DataFrame
+            The arguments to be trained on
+        store : EmbeddingStore
+            The store containing the embeddings of all arguments
+        labels : list[str]
+            The listing of all labels
+        model_file : str
+            The file for storing the weights of the linear head
+        test_dataframe : pd.DataFrame, optional
+            The validation arguments (default is None)
+        num_train_epochs : int, optional
+            The number of full-batch training steps (default is 300)
+        learning_rate : float, optional
+            The learning rate of the Adam optimizer (default is 1e-2)
+        weight_decay : float, optional
+            The L2 regularization of the Adam optimizer (default is 1e-4)
+
+        Returns
+        -------
+        dict
+            f1-scores of validation if `test_dataframe` is not None
+        NoneType
+            otherwise
+        """
+    inputs = torch.from_numpy(store.get(train_dataframe['Argument ID']))
+    targets = torch.from_numpy(train_dataframe[labels].to_numpy(dtype=np.float32))
+
+    # balance positive and negative examples per label like the class-weighted SVMs
+    num_positive = targets.sum(dim=0)
+    pos_weight = (len(targets) - num_positive) / num_positive.clamp(min=1)
+
+    head = torch.nn.Linear(inputs.shape[1], len(labels))
+    optimizer = torch.optim.Adam(head.parameters(), lr=learning_rate, weight_decay=weight_decay)
+    loss_fct = torch.nn.BCEWithLogitsLoss(pos_weight=pos_weight)
+    for _ in range(num_train_epochs):
+        optimizer.zero_grad()
+        loss = loss_fct(head(inputs), targets)
+        loss.backward()
+        optimizer.step()
+
+    np.savez(model_file, **{weight_label: head.weight.detach().numpy(), bias_label: head.bias.detach().numpy(),
+                            labels_label: np.asarray(labels)})
+
+    if test_dataframe is not None:
+        valid_pred = predict_linear_heads(test_dataframe, store, labels, model_file)
+        f1_scores = {}
+        for label_name in labels:
+            f1_scores[label_name] = round(f1_score(test_dataframe[label_name], valid_pred[label_name],
+                                                   zero_division=0), 2)
+        f1_scores['avg-f1-score'] = round(np.mean(list(f1_scores.values())), 2)
+        return f1_scores
+
+
+def predict_linear_heads(dataframe, store, labels, model_file):
+    """
+        Classifies each argument in the dataframe using its stored embedding and the linear head in `model_file`
+
+        Parameters
+        ----------
+        dataframe : pd.DataFrame
+            The arguments to be classified
+        store : EmbeddingStore
+            The store containing the embeddings of all arguments in `dataframe`
+        labels : list[str]
+            The listing of all labels
+        model_file : str
+            The file containing the weights of the linear head
+
+        Returns
+        -------
+        DataFrame
+            the predictions given by the model
+        """
+    with np.load(model_file) as head:
+        if head[labels_label].tolist() != list(labels):
+            raise ValueError('The linear head in "%s" was trained for different labels' % model_file)
+        logits = store.get(dataframe['Argument ID']) @ head[weight_label].T + head[bias_label]
+
+    return pd.DataFrame(1 * (logits > 0), columns=labels)
@@ -0,0 +1,131 @@
+import queue
+import threading
+
+from concurrent.futures import ThreadPoolExecutor
+
+import torch
+import numpy as np
+import pandas as pd
+
+from .bert import (get_tokenizer, load_cached_model)
+from ..setup import (create_dataframe_head, deduplicate_premises, expand_predictions)
+
+# marks the end of the chunks in the queue
+_end_of_chunks = object()
+
+# seconds between the producer's checks whether the consumer stopped while the queue is full
+_put_timeout = 0.1
+
+
+def _put(prepared_queue, item, stopped):
+    """Puts the item into the bounded queue once there is room and returns False if the consumer stopped before"""
+    while not stopped.is_set():
+        try:
+            prepared_queue.put(item, timeout=_put_timeout)
+            return True
+        except queue.Full:
+            pass
+    return False
+
+
+def _prepare_chunks(chunks, prepared_queue, batch_size, stopped):
+    """Deduplicates and tokenizes each chunk into padded batches and puts it into the bounded queue"""
+    tokenizer = get_tokenizer()
+    try:
+        for df_chunk in chunks:
+            if len(df_chunk) == 0:
+                continue
+            df_chunk = df_chunk.reset_index(drop=True)
+            df_unique, inverse = deduplicate_premises(df_chunk)
+            premises = df_unique['Premise'].tolist()
+            batches = [tokenizer(premises[start:start + batch_size], truncation=True, padding=True, return_tensors='pt')
+                       for start in range(0, len(premises), batch_size)]
+            if not _put(prepared_queue, (df_chunk, len(df_unique), inverse, batches), stopped):
+                return
+        _put(prepared_queue, _end_of_chunks, stopped)
+    except BaseException as e:
+        _put(prepared_queue, e, stopped)
+
+
+def _infer(model, batches):
+    """Computes the logits of the model for the prepared batches"""
+    logits = []
+    with torch.no_grad():
+        for batch in batches:
+            batch = {key: value.to(model.device) for key, value in batch.items()}
+            logits.append(model(**batch).logits.cpu().numpy())
+    return np.concatenate(logits)
+
+
+def predict_bert_pipelined(chunks, model_dirs, labels_per_level, write_chunk, batch_size=8, queue_size=2):
+    """
+        Classifies chunks of arguments with the Bert models of all levels, overlapping I/O and computation
+
+        While the main thread runs the inference of one chunk, a producer thread reads, deduplicates and tokenizes the
+        next chunks into a bounded queue, a loader thread loads the models of the following levels, and a writer
+        thread writes the predictions of the previous chunk. The models of all levels stay loaded until all chunks
+        are predicted. Each chunk is deduplicated on its own, so that only its distinct premises are inferred. If the inference or writing fails, the producer thread stops at its next chunk.
+
+        Parameters
+        ----------
+        chunks : iterable[pd.DataFrame]
+            The chunks of arguments to be classified; reading happens while iterating
+        model_dirs : list[str]
+            The directories of the pre-trained Bert models, one per level
+        labels_per_level : list[list[str]]
+            The labels to predict, one list per level
+        write_chunk : function
+            Function called with the prediction `DataFrame` of each chunk, in the order of the chunks
+        batch_size : int, optional
+            The number of arguments per forward pass (default is 8)
+        queue_size : int, optional
+            The number of tokenized chunks that may wait for inference (default is 2)
+
+        Returns
+        -------
+        tuple(int, int)
+            the number of predicted arguments,
+            the number of distinct premises that were inferred
+        """
+    prepared_queue = queue.Queue(maxsize=queue_size)
+    stopped = threading.Event()
+    producer = threading.Thread(target=_prepare_chunks, args=(chunks, prepared_queue, batch_size, stopped),
+                                daemon=True)
+    num_arguments = 0
+    num_unique = 0
+
+    try:
+        with ThreadPoolExecutor(max_workers=1) as loader, ThreadPoolExecutor(max_workers=1) as writer:
+            # the loader works through the levels in order, so the next level loads while the current one predicts
+            models = [loader.submit(load_cached_model, model_dir, len(labels))
+                      for model_dir, labels in zip(model_dirs, labels_per_level)]
+            producer.start()
+            pending_write = None
+            while True:
+                item = prepared_queue.get()
+                if item is _end_of_chunks:
+                    break
+                if isinstance(item, BaseException):
+                    raise item
+                df_chunk, chunk_unique, inverse, batches = item
+
+                df_bert = create_dataframe_head(df_chunk['Argument ID'], model_name='Bert')
+                for model, labels in zip(models, labels_per_level):
+                    prediction = expand_predictions(1 * (_infer(model.result(), batches) > 0.5), inverse)
+                    df_bert = pd.concat([df_bert, pd.DataFrame(prediction, columns=labels)], axis=1)
+
+                # a failed write stops the pipeline before the next chunk instead of leaving a gap in the output
+                if pending_write is not None:
+                    pending_write.result()
+                pending_write = writer.submit(write_chunk, df_bert)
+                num_arguments += len(df_chunk)
+                num_unique += chunk_unique
+
+            if pending_write is not None:
+                pending_write.result()
+    finally:
+        # on failure, the producer may wait for room in the queue that no one makes anymore
+        stopped.set()
+        if producer.is_alive():
+            producer.join()
+    return num_arguments, num_unique
@@ -0,0 +1,132 @@
+import os
+import threading
+
+from collections import OrderedDict
+
+
+def artifact_mtime(path):
+    """Returns the latest modification time of the file `path` or of the files directly inside the directory `path`"""
+    if not os.path.isdir(path):
+        return os.path.getmtime(path) if os.path.exists(path) else None
+    mtimes = [entry.stat().st_mtime for entry in os.scandir(path) if entry.is_file()]
+    return max(mtimes) if len(mtimes) > 0 else os.path.getmtime(path)
+
+
+class ModelRegistry:
+    """
+        An in-process cache of loaded models with memory-bounded least-recently-used eviction
+
+        Entries are keyed by their kind, the absolute path and the modification time of their artifacts, so a model is
+        reloaded after its files on disk changed.
+
+        ...
+        Attributes
+        ----------
+        max_bytes : int
+            The estimated memory the cached entries may occupy in total
+        hits : int
+            The number of requests served from the cache
+        misses : int
+            The number of requests that required loading
+        evictions : int
+            The number of entries removed to stay within `max_bytes`
+
+        Methods
+        -------
+        get(kind, paths, loader, size_of):
+            Returns the cached entry or loads and caches it
+        clear():
+            Removes all entries
+        stats():
+            Returns the counters and the current memory usage
+    """
+
+    def __init__(self, max_bytes=4 * 1024 ** 3):
+        """
+            Constructs all necessary attributes for the ModelRegistry object
+
+            Parameters
+            ----------
+            max_bytes : int, optional
+                The estimated memory the cached entries may occupy in total (default is 4 GiB)
+        """
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._sizes = {}
+        self._lock = threading.RLock()
+
+    def get(self, kind, paths, loader, size_of):
+        """
+            Returns the cached entry for the artifacts at `paths` or loads and caches it
+
+            Parameters
+            ----------
+            kind : str
+                The kind of entry, distinguishing different loaders for the same paths
+            paths : str or tuple[str]
+                The files or directories the entry is loaded from; names that do not exist on disk (like model names of
+                the Hugging Face hub) are keyed by name only
+            loader : function
+                Function without parameters loading the entry
+            size_of : function
+                Function returning the estimated memory in bytes of a loaded entry
+
+            Returns
+            -------
+            object
+                the loaded entry
+        """
+        if isinstance(paths, str):
+            paths = (paths,)
+        location = (kind,) + tuple(os.path.abspath(path) if os.path.exists(path) else path for path in paths)
+        key = location + tuple(artifact_mtime(path) for path in paths)
+
+        with self._lock:
+            if key in self._entries:
+                self.hits += 1
+                self._entries.move_to_end(key)
+                return self._entries[key]
+            self.misses += 1
+
+        entry = loader()
+        size = size_of(entry)
+
+        with self._lock:
+            # drop entries of the same artifacts loaded before they were modified
+            for stale_key in [k for k in self._entries if k[:len(location)] == location]:
+                self._remove(stale_key)
+            self._entries[key] = entry
+            self._sizes[key] = size
+            while len(self._entries) > 1 and sum(self._sizes.values()) > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+        return entry
+
+    def _remove(self, key):
+        """Removes the entry with `key`"""
+        del self._entries[key]
+        del self._sizes[key]
+
+    def clear(self):
+        """Removes all entries"""
+        with self._lock:
+            self._entries.clear()
+            self._sizes.clear()
+
+    def stats(self):
+        """Returns the counters, the number of entries and their estimated memory in bytes"""
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses, 'evictions': self.evictions,
+                    'entries': len(self._entries), 'bytes': sum(self._sizes.values())}
+
+
+def module_size(model):
+    """Returns the memory in bytes of the parameters and buffers of a torch module"""
+    return sum(t.numel() * t.element_size() for t in list(model.parameters()) + list(model.buffers()))
+
+
+# registry shared by all prediction functions of this process
+model_registry = ModelRegistry()
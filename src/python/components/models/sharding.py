@@ -0,0 +1,181 @@
+import os
+import time
+import multiprocessing
+
+import torch
+import numpy as np
+
+from .bert import (get_tokenizer, load_model_from_data_dir, load_cached_model)
+from .threads import (available_cpus)
+
+# model shared with the worker processes, set before the pool is started
+_shared_model = None
+
+
+def _init_worker(model_dir, num_labels, num_threads):
+    """Caps the threads of a worker process and loads the model unless it was inherited from the parent"""
+    global _shared_model
+    torch.set_num_threads(num_threads)
+    if _shared_model is None:
+        _shared_model = load_model_from_data_dir(model_dir, num_labels=num_labels).to('cpu')
+    _shared_model.eval()
+
+
+def _predict_shard(args):
+    """Computes the logits for one shard of premises, batching premises of similar length together"""
+    premises, batch_size = args
+    tokenizer = get_tokenizer()
+    logits = np.zeros((len(premises), _shared_model.config.num_labels), dtype=np.float32)
+    order = np.argsort([len(premise) for premise in premises], kind='stable')
+    with torch.no_grad():
+        for start in range(0, len(order), batch_size):
+            batch_indices = order[start:start + batch_size]
+            batch = tokenizer([premises[i] for i in batch_indices], truncation=True, padding=True,
+                              return_tensors='pt')
+            logits[batch_indices] = _shared_model(**batch).logits.numpy()
+    return logits
+
+
+def _shard_bounds(num_items, num_shards):
+    """Returns start and end indices of `num_shards` contiguous shards of nearly equal size"""
+    bounds = np.linspace(0, num_items, num_shards + 1).astype(int)
+    return bounds[:-1].tolist(), bounds[1:].tolist()
+
+
+def predict_bert_logits_sharded(dataframe, model_dir, labels, num_workers, threads_per_worker=None, batch_size=8):
+    """
+        Computes the logits of the Bert model stored in `model_dir` on the CPU with `num_workers` processes
+
+        The arguments are split into `num_workers` contiguous shards. Where the platform supports forking, the model is
+        loaded once and shared copy-on-write with all workers; otherwise each worker loads its own copy.
+
+        Parameters
+        ----------
+        dataframe : pd.DataFrame
+            The arguments to be classified
+        model_dir : str
+            The directory of the pre-trained Bert model to use
+        labels : list[str]
+            The labels to predict
+        num_workers : int
+            The number of worker processes
+        threads_per_worker : int, optional
+            The number of torch threads of each worker (default is the number of available CPUs divided by
+            `num_workers`)
+        batch_size : int, optional
+            The number of arguments per forward pass (default is 8)
+
+        Returns
+        -------
+        np.ndarray
+            numpy nd-array of shape (n_arguments, n_labels) with the logits in the order of `dataframe`
+        """
+    global _shared_model
+    num_labels = len(labels)
+    premises = dataframe['Premise'].tolist()
+    num_workers = max(1, min(num_workers, len(premises)))
+    if threads_per_worker is None:
+        threads_per_worker = max(1, available_cpus() // num_workers)
+
+    # the tokenizer's own thread pool does not survive forking and would only compete with the workers
+    os.environ.setdefault('TOKENIZERS_PARALLELISM', 'false')
+    get_tokenizer()
+
+    if 'fork' in multiprocessing.get_all_start_methods():
+        context = multiprocessing.get_context('fork')
+        if torch.cuda.is_available():
+            _shared_model = load_model_from_data_dir(model_dir, num_labels=num_labels).to('cpu')
+        else:
+            # the registry keeps the model for the next call, e.g. for the next corpus of a manifest
+            _shared_model = load_cached_model(model_dir, num_labels=num_labels)
+    else:
+        context = multiprocessing.get_context('spawn')
+
+    shards = [(premises[start:end], batch_size)
+              for start, end in zip(*_shard_bounds(len(premises), num_workers))]
+    try:
+        with context.Pool(num_workers, initializer=_init_worker,
+                          initargs=(model_dir, num_labels, threads_per_worker)) as pool:
+            results = pool.map(_predict_shard, shards)
+    finally:
+        _shared_model = None
+
+    if len(results) == 0:
+        return np.zeros((0, num_labels), dtype=np.float32)
+    return np.concatenate(results)
+
+
+def predict_bert_model_sharded(dataframe, model_dir, labels, num_workers, threads_per_worker=None, batch_size=8):
+    """
+        Classifies each argument using the Bert model stored in `model_dir` with `num_workers` CPU processes
+
+        Parameters
+        ----------
+        dataframe : pd.DataFrame
+            The arguments to be classified
+        model_dir : str
+            The directory of the pre-trained Bert model to use
+        labels : list[str]
+            The labels to predict
+        num_workers : int
+            The number of worker processes
+        threads_per_worker : int, optional
+            The number of torch threads of each worker (default is the number of CPUs divided by `num_workers`)
+        batch_size : int, optional
+            The number of arguments per forward pass (default is 8)
+
+        Returns
+        -------
+        np.ndarray
+            numpy nd-array with the predictions given by the model
+        """
+    logits = predict_bert_logits_sharded(dataframe, model_dir, labels, num_workers,
+                                         threads_per_worker=threads_per_worker, batch_size=batch_size)
+    return 1 * (logits > 0.5)
+
+
+def benchmark_sharding(dataframe, model_dir, labels, worker_counts=None, batch_size=8):
+    """
+        Compares the throughput of sharded Bert prediction for different numbers of worker processes
+
+        Parameters
+        ----------
+        dataframe : pd.DataFrame
+            The arguments to benchmark on
+        model_dir : str
+            The directory of the pre-trained Bert model to use
+        labels : list[str]
+            The labels to predict
+        worker_counts : list[int], optional
+            The numbers of worker processes to compare (default is None for 1, the powers of two below the available
+            CPUs, and the available CPUs)
+        batch_size : int, optional
+            The number of arguments per forward pass (default is 8)
+
+        Returns
+        -------
+        list[dict]
+            for each number of workers the throughput, the speedup over one worker, the scaling efficiency (speedup per
+            worker) and the agreement of the predictions with one worker
+        """
+    if worker_counts is None:
+        cpus = available_cpus()
+        worker_counts = sorted({1, cpus} | {2 ** i for i in range(1, cpus.bit_length()) if 2 ** i < cpus})
+
+    # load the model once, so that all timings below compare the inference only
+    load_cached_model(model_dir, num_labels=len(labels))
+
+    results = []
+    base_seconds, base_prediction = None, None
+    for num_workers in worker_counts:
+        start = time.perf_counter()
+        prediction = predict_bert_model_sharded(dataframe, model_dir, labels, num_workers, batch_size=batch_size)
+        seconds = time.perf_counter() - start
+        if base_seconds is None:
+            base_seconds, base_prediction = seconds, prediction
+        speedup = base_seconds / seconds
+        results.append({'workers': num_workers, 'threads-per-worker': max(1, available_cpus() // num_workers),
+                        'arguments-per-second': round(len(dataframe) / seconds, 2), 'speedup': round(speedup, 2),
+                        'efficiency': round(speedup / num_workers, 2),
+                        'agreement': round(float((prediction == base_prediction).mean()), 4)})
+    return results
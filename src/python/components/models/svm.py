@@ -4,10 +4,17 @@ from sklearn.svm import LinearSVC
 from sklearn.pipeline import Pipeline
 from sklearn.metrics import f1_score
 
+from scipy import sparse
+
 import pandas as pd
 import numpy as np
 
+import os
 import json
+import time
+import tempfile
+
+from .registry import (model_registry)
 
 # constant label values
 vocab_label = 'vocabulary'
@@ -15,83 +22,197 @@ idf_label = 'idf'
 intercept_label = 'intercept'
 coef_label = 'coef'
 
+# decision values of at least the threshold are predicted as the label
+decision_threshold = 0.5
+
+# compression settings (threshold, top_k, dtype) compared by `benchmark_svm_compression`
+svm_compression_settings = [(0.0, None, 'float32'), (0.0, None, 'float16'), (0.01, None, 'float32'),
+                            (0.05, None, 'float32'), (0.05, None, 'float16'), (0.0, 5000, 'float32'),
+                            (0.0, 1000, 'float32'), (0.0, 1000, 'float16')]
 
-class MyLinearSVC(LinearSVC):
+
+class SvmWeights:
     """
-        A class to load and store a pretrained linear svm for predictions
+        The fitted TF-IDF vectorizer and the weights of all per-label SVMs of one level as matrices
 
         ...
         Attributes
         ----------
-        intercept : int
-            The intercept constant
-        coef : ndarray
-            The coefficients for all observed features
+        vectorizer : TfidfVectorizer
+            The fitted vectorizer
+        labels : list[str]
+            The labels in the order of the matrix rows
+        coef : ndarray or sparse matrix of shape (n_labels, n_features)
+            The coefficients of each label's SVM, as CSR matrix if the weights are compressed
+        intercept : ndarray of shape (n_labels,)
+            The intercept of each label's SVM
 
         Methods
         -------
-        predict(X):
-            Overrides `predict(X)` from LinearSVC
+        decision_function(premises, labels):
+            Computes the decision values of the SVMs for the given labels
     """
 
-    def __init__(self, intercept, coef):
+    def __init__(self, vocabulary, idf, labels, coef, intercept):
         """
-            Constructs all necessary attributes for the MyLinearSVC object
+            Constructs all necessary attributes for the SvmWeights object
 
             Parameters
             ----------
-            intercept : int
-                The intercept constant
-            coef : list[int]
-                The coefficients for all observed features
+            vocabulary : dict[str, int]
+                The vocabulary of the fitted TfidfVectorizer
+            idf : array-like of shape (n_features,)
+                The inverse document frequencies of the fitted TfidfVectorizer
+            labels : list[str]
+                The labels in the order of the rows of `coef` and `intercept`
+            coef : array-like or sparse matrix of shape (n_labels, n_features)
+                The coefficients of each label's SVM
+            intercept : array-like of shape (n_labels,)
+                The intercept of each label's SVM
         """
-        LinearSVC.__init__(self, C=18, class_weight='balanced', max_iter=10000)
-        self.intercept = intercept
-        self.coef = np.asarray(coef)
-        self.size = len(coef)
-
-    def predict(self, X):
+        self.vectorizer = TfidfVectorizer(vocabulary=vocabulary)
+        self.vectorizer.idf_ = np.asarray(idf)
+        self.labels = list(labels)
+        self.coef = sparse.csr_matrix(coef) if sparse.issparse(coef) else np.asarray(coef)
+        self.intercept = np.asarray(intercept)
+        self._label_index = {label_name: i for i, label_name in enumerate(self.labels)}
+
+    def size(self):
+        """Returns the estimated memory in bytes of the weights and the vocabulary"""
+        if sparse.issparse(self.coef):
+            coef_bytes = self.coef.data.nbytes + self.coef.indices.nbytes + self.coef.indptr.nbytes
+        else:
+            coef_bytes = self.coef.nbytes
+        return coef_bytes + self.intercept.nbytes + self.vectorizer.idf_.nbytes + 100 * len(self.vectorizer.vocabulary)
+
+    def decision_function(self, premises, labels):
         """
-            Predict class labels for samples in X
+            Computes the decision values of the SVMs for the given labels
 
             Parameters
             ----------
-            X : {array-like, sparse matrix} of shape (n_samples, n_features)
-                The data matrix for which we want to get the predictions
+            premises : list[str]
+                The premises to classify
+            labels : list[str]
+                The labels to compute the decision values for
 
             Returns
             -------
-            ndarray of shape (n_samples,)
-                Vector containing the class labels for each sample
+            ndarray of shape (n_premises, n_labels)
+                the decision values, which are compared against 0.5 for the predictions
         """
-        input = np.transpose(X.todense())
-        matrix = np.squeeze(np.asarray(self.__my_predict(input)))
-        return np.vectorize(lambda x: 1 if x >= 0.5 else 0)(matrix)
+        rows = [self._label_index[label_name] for label_name in labels]
+        features = self.vectorizer.transform(premises)
+        decision_values = features @ self.coef[rows].T
+        if sparse.issparse(decision_values):
+            decision_values = decision_values.toarray()
+        return np.asarray(decision_values) + self.intercept[rows]
+
+
+def load_svm_weights(vectorizer_file, model_file):
+    """Loads the vectorizer and SVM weights from the specified files, where a ".npz" `model_file` holds compressed weights"""
+    with open(vectorizer_file, "r") as f:
+        vectorizer_json = json.load(f)
+    if model_file.endswith('.npz'):
+        with np.load(model_file) as npz:
+            # float16 weights are stored only; sparse products need at least float32
+            coef = sparse.csr_matrix((npz['data'].astype(np.float32), npz['indices'], npz['indptr']),
+                                     shape=tuple(npz['shape']))
+            return SvmWeights(vectorizer_json[vocab_label], vectorizer_json[idf_label], npz['labels'].tolist(), coef,
+                              npz['intercept'])
+    with open(model_file, "r") as f:
+        model_json = json.load(f)
+    labels = list(model_json.keys())
+    return SvmWeights(vectorizer_json[vocab_label], vectorizer_json[idf_label], labels,
+                      [model_json[label_name][coef_label] for label_name in labels],
+                      [model_json[label_name][intercept_label] for label_name in labels])
 
-    def __my_predict(self, input):
+
+def load_cached_svm_weights(vectorizer_file, model_file):
+    """Returns the vectorizer and SVM weights from the specified files, loading them only if they are not in the registry"""
+    return model_registry.get('svm', (vectorizer_file, model_file),
+                              lambda: load_svm_weights(vectorizer_file, model_file), lambda x: x.size())
+
+
+def locate_svm_model_file(model_dir, level):
+    """Returns the compressed SVM model file of the level in `model_dir` if it exists, and the JSON one otherwise"""
+    compressed_model_file = os.path.join(model_dir, 'svm/svm_train_level{}_models.npz'.format(level))
+    if os.path.exists(compressed_model_file):
+        return compressed_model_file
+    return os.path.join(model_dir, 'svm/svm_train_level{}_models.json'.format(level))
+
+
+def compress_svm_weights(svm_weights, threshold=0.0, top_k=None):
+    """
+        Prunes the SVM weights to a sparse matrix
+
+        Parameters
+        ----------
+        svm_weights : SvmWeights
+            The weights to prune
+        threshold : float, optional
+            The magnitude below which weights are dropped (default is 0.0)
+        top_k : int, optional
+            The number of weights with the largest magnitude to keep per label (default is None for all)
+
+        Returns
+        -------
+        SvmWeights
+            the pruned weights with the coefficients as CSR matrix
         """
-            Predict class label probability for samples in input
+    coef = svm_weights.coef.toarray() if sparse.issparse(svm_weights.coef) else np.array(svm_weights.coef)
+    if threshold > 0:
+        coef[np.abs(coef) < threshold] = 0
+    if top_k is not None and top_k < coef.shape[1]:
+        dropped = np.argpartition(np.abs(coef), coef.shape[1] - top_k, axis=1)[:, :coef.shape[1] - top_k]
+        np.put_along_axis(coef, dropped, 0, axis=1)
+    return SvmWeights(svm_weights.vectorizer.vocabulary, svm_weights.vectorizer.idf_, svm_weights.labels,
+                      sparse.csr_matrix(coef), svm_weights.intercept)
 
-            Parameters
-            ----------
-            input : ndarray of shape (n_features, n_samples)
-                The data matrix for which we want to get the predictions
 
-            Returns
-            -------
-            ndarray of shape (n_samples,)
-                Vector containing the class labels for each sample
+def save_compressed_svm_weights(svm_weights, model_file, dtype='float32'):
+    """Saves the SVM weights as sparse matrix with values of the given dtype into the ".npz" `model_file`"""
+    coef = sparse.csr_matrix(svm_weights.coef)
+    with open(model_file, "wb") as f:
+        np.savez(f, labels=np.asarray(svm_weights.labels), intercept=np.asarray(svm_weights.intercept),
+                 data=coef.data.astype(dtype), indices=coef.indices, indptr=coef.indptr, shape=np.asarray(coef.shape))
+
+
+def compress_svm(vectorizer_file, model_file, compressed_model_file, threshold=0.0, top_k=None, dtype='float32'):
+    """
+        Prunes the trained Support Vector Machines (SVMs) in the `model_file` and saves them in sparse form
+
+        Parameters
+        ----------
+        vectorizer_file : str
+            The file containing the fitted data from the TfidfVectorizer
+        model_file : str
+            The file containing the serialized SVM models
+        compressed_model_file : str
+            The ".npz" file for storing the compressed SVM models, which `predict_svm` reads in place of `model_file`
+        threshold : float, optional
+            The magnitude below which weights are dropped (default is 0.0)
+        top_k : int, optional
+            The number of weights with the largest magnitude to keep per label (default is None for all)
+        dtype : str, optional
+            The stored type of the weights, "float32" or "float16" (default is "float32")
+
+        Returns
+        -------
+        dict
+            the fraction of kept weights and the sizes of both model files
         """
-        result = input[0] * self.coef[0]
-        for i in range(1, self.size):
-            result += input[i] * self.coef[i]
-        result += self.intercept
-        return result
+    svm_weights = load_svm_weights(vectorizer_file, model_file)
+    compressed_weights = compress_svm_weights(svm_weights, threshold=threshold, top_k=top_k)
+    save_compressed_svm_weights(compressed_weights, compressed_model_file, dtype=dtype)
+    return {'kept-weights': round(compressed_weights.coef.nnz / max(np.prod(compressed_weights.coef.shape), 1), 4),
+            'model-mb': round(os.path.getsize(model_file) / 1024 ** 2, 2),
+            'compressed-model-mb': round(os.path.getsize(compressed_model_file) / 1024 ** 2, 2)}
 
 
-def predict_svm(dataframe, labels, vectorizer_file, model_file):
+def decision_svm(dataframe, labels, vectorizer_file, model_file):
     """
-        Classifies each argument in the dataframe using the trained Support Vector Machines (SVMs) in the `model_file`
+        Computes the decision values of the trained Support Vector Machines (SVMs) in the `model_file` for each argument
 
         Parameters
         ----------
@@ -102,38 +223,46 @@ def predict_svm(dataframe, labels, vectorizer_file, model_file):
         vectorizer_file : str
             The file containing the fitted data from the TfidfVectorizer
         model_file : str
-            The file containing the serialized SVM models
+            The file containing the serialized SVM models, or the ".npz" file of the compressed ones
 
         Returns
         -------
-        DataFrame
-            the predictions given by the model
+        np.ndarray
+            numpy nd-array of shape (n_arguments, n_labels) with the decision values, where values of at least
+            `decision_threshold` are predicted as the label
         """
-    input_vector = dataframe['Premise']
-    df_model_predictions = {}
+    svm_weights = load_cached_svm_weights(vectorizer_file, model_file)
+    return svm_weights.decision_function(dataframe['Premise'], labels)
 
-    # load vectorizer
-    with open(vectorizer_file, "r") as f:
-        vectorizer_json = json.load(f)
 
-    vocabulary = vectorizer_json[vocab_label]
-    idf = np.asarray(vectorizer_json[idf_label])
+def predict_svm_decision(decision_values, labels):
+    """Returns the predictions for the decision values of the Support Vector Machines (SVMs) as DataFrame"""
+    return pd.DataFrame(1 * (decision_values >= decision_threshold), columns=labels)
 
-    vectorizer = TfidfVectorizer(vocabulary=vocabulary)
-    vectorizer.idf_ = idf
 
-    with open(model_file, "r") as f:
-        model_json = json.load(f)
+def predict_svm(dataframe, labels, vectorizer_file, model_file):
+    """
+        Classifies each argument in the dataframe using the trained Support Vector Machines (SVMs) in the `model_file`
 
-    for label_name in labels:
-        model_dict = model_json[label_name]
-        svm = Pipeline([
-            ('tfidf', vectorizer),
-            ('clf', MyLinearSVC(intercept=model_dict[intercept_label], coef=model_dict[coef_label])),
-        ])
-        df_model_predictions[label_name] = svm.predict(input_vector)
+        Parameters
+        ----------
+        dataframe : pd.DataFrame
+            The arguments to be classified
+        labels : list[str]
+            The listing of all labels
+        vectorizer_file : str
+            The file containing the fitted data from the TfidfVectorizer
+        model_file : str
+            The file containing the serialized SVM models, or the ".npz" file of the compressed ones
 
-    return pd.DataFrame(df_model_predictions, columns=labels)
+        Returns
+        -------
+        DataFrame
+            the predictions given by the model
+        """
+    decision_values = decision_svm(dataframe, labels, vectorizer_file, model_file)
+
+    return predict_svm_decision(decision_values, labels)
 
 
 def train_svm(train_dataframe, labels, vectorizer_file, model_file, test_dataframe=None):
@@ -197,3 +326,61 @@ def train_svm(train_dataframe, labels, vectorizer_file, model_file, test_datafra
     if test_dataframe is not None:
         f1_scores['avg-f1-score'] = round(np.mean(list(f1_scores.values())), 2)
         return f1_scores
+
+
+def benchmark_svm_compression(dataframe, labels, vectorizer_file, model_file, settings=None):
+    """
+        Compares size, throughput and F1-score of compressed SVM models against the uncompressed ones
+
+        Parameters
+        ----------
+        dataframe : pd.DataFrame
+            The validation arguments with their true labels
+        labels : list[str]
+            The listing of all labels
+        vectorizer_file : str
+            The file containing the fitted data from the TfidfVectorizer
+        model_file : str
+            The file containing the serialized SVM models
+        settings : list[tuple(float, int, str)], optional
+            The compared (threshold, top_k, dtype) settings (default is `svm_compression_settings`)
+
+        Returns
+        -------
+        list[dict]
+            the model file size, throughput and macro F1-score of the uncompressed models, and for each setting the
+            fraction of kept weights, the size reduction, the throughput gain and the change in macro F1-score
+        """
+    if settings is None:
+        settings = svm_compression_settings
+    premises = dataframe['Premise'].tolist()
+    y_true = dataframe[labels].to_numpy(dtype=int)
+
+    def measure(svm_weights):
+        start = time.perf_counter()
+        prediction = predict_svm_decision(svm_weights.decision_function(premises, labels), labels).to_numpy()
+        seconds = time.perf_counter() - start
+        return seconds, f1_score(y_true, prediction, average='macro', zero_division=0)
+
+    svm_weights = load_svm_weights(vectorizer_file, model_file)
+    model_bytes = os.path.getsize(model_file)
+    dense_seconds, dense_f1 = measure(svm_weights)
+    results = [{'setting': 'uncompressed', 'model-mb': round(model_bytes / 1024 ** 2, 2),
+                'arguments-per-second': round(len(premises) / dense_seconds, 2), 'f1-score': round(dense_f1, 3)}]
+
+    with tempfile.TemporaryDirectory() as compressed_dir:
+        compressed_model_file = os.path.join(compressed_dir, 'models.npz')
+        for threshold, top_k, dtype in settings:
+            save_compressed_svm_weights(compress_svm_weights(svm_weights, threshold=threshold, top_k=top_k),
+                                        compressed_model_file, dtype=dtype)
+            compressed_weights = load_svm_weights(vectorizer_file, compressed_model_file)
+            seconds, f1 = measure(compressed_weights)
+            compressed_bytes = os.path.getsize(compressed_model_file)
+            kept_weights = compressed_weights.coef.nnz / max(np.prod(compressed_weights.coef.shape), 1)
+            results.append({'setting': 'threshold={} top-k={} dtype={}'.format(threshold, top_k, dtype),
+                            'kept-weights': round(kept_weights, 4), 'model-mb': round(compressed_bytes / 1024 ** 2, 2),
+                            'size-reduction': round(model_bytes / max(compressed_bytes, 1), 1),
+                            'arguments-per-second': round(len(premises) / seconds, 2),
+                            'throughput-gain': round(dense_seconds / seconds, 2), 'f1-score': round(f1, 3),
+                            'f1-change': round(f1 - dense_f1, 3)})
+    return results
@@ -0,0 +1,150 @@
+import os
+import json
+import time
+
+import torch
+
+from threadpoolctl import (threadpool_limits)
+
+from .bert import (predict_bert_logits, load_cached_model)
+
+# keys of a thread configuration, as saved by tune.py
+thread_config_keys = ['intra-op-threads', 'inter-op-threads', 'blas-threads', 'tokenizer-parallelism', 'batch-size']
+
+
+def available_cpus():
+    """Returns the number of CPUs this process may use, considering its CPU affinity and the container's CPU quota"""
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cpus = os.cpu_count() or 1
+
+    quota = None
+    try:
+        # cgroup v2
+        with open('/sys/fs/cgroup/cpu.max', 'r') as f:
+            limit, period = f.read().split()[:2]
+        if limit != 'max':
+            quota = int(limit) / int(period)
+    except (OSError, ValueError):
+        try:
+            # cgroup v1
+            with open('/sys/fs/cgroup/cpu/cpu.cfs_quota_us', 'r') as f:
+                limit = int(f.read())
+            with open('/sys/fs/cgroup/cpu/cpu.cfs_period_us', 'r') as f:
+                period = int(f.read())
+            if limit > 0:
+                quota = limit / period
+        except (OSError, ValueError):
+            pass
+
+    if quota is not None:
+        cpus = min(cpus, max(1, int(quota)))
+    return cpus
+
+
+def apply_thread_config(config):
+    """
+        Sets the thread counts of torch, the BLAS libraries and the tokenizers for this process
+
+        Parameters
+        ----------
+        config : dict
+            The thread configuration; missing keys and None values leave the respective setting unchanged
+    """
+    if config.get('intra-op-threads') is not None:
+        torch.set_num_threads(config['intra-op-threads'])
+    if config.get('inter-op-threads') is not None and config['inter-op-threads'] != torch.get_num_interop_threads():
+        try:
+            torch.set_num_interop_threads(config['inter-op-threads'])
+        except RuntimeError:
+            # torch allows this only before the first inter-op parallel work
+            print('Unable to change the inter-op threads anymore, keeping %d' % torch.get_num_interop_threads())
+    if config.get('blas-threads') is not None:
+        threadpool_limits(limits=config['blas-threads'], user_api='blas')
+    if config.get('tokenizer-parallelism') is not None:
+        os.environ['TOKENIZERS_PARALLELISM'] = 'true' if config['tokenizer-parallelism'] else 'false'
+
+
+def load_thread_config(config_file):
+    """Loads a thread configuration saved by `save_thread_config` and raises a `ValueError` on unknown keys"""
+    with open(config_file, 'r') as f:
+        config = json.load(f)
+    unknown_keys = set(config.keys()) - set(thread_config_keys)
+    if len(unknown_keys) > 0:
+        raise ValueError('Unknown keys %s in thread configuration "%s"' % (sorted(unknown_keys), config_file))
+    return config
+
+
+def save_thread_config(config, config_file):
+    """Saves the thread configuration into `config_file`"""
+    with open(config_file, 'w') as f:
+        json.dump({key: config[key] for key in thread_config_keys if key in config}, f, indent=2)
+
+
+def tune_thread_config(dataframe, model_dir, labels, thread_counts=None, batch_sizes=(8, 16, 32), num_samples=64,
+                       inter_op_threads=None):
+    """
+        Finds the fastest thread and batch size configuration for predicting with the Bert model on this host
+
+        All combinations of thread counts and batch sizes are timed. The torch inter-op threads can only be set once per
+        process and are therefore not tuned. Neither is the tokenizer parallelism, which can not be changed reliably
+        once the tokenizer ran in a process.
+
+        Parameters
+        ----------
+        dataframe : pd.DataFrame
+            The arguments to sample from
+        model_dir : str
+            The directory of the pre-trained Bert model to use
+        labels : list[str]
+            The labels of the model
+        thread_counts : list[int], optional
+            The intra-op and BLAS thread counts to try (default is None for 1, the powers of two below the available
+            CPUs, and the available CPUs)
+        batch_sizes : tuple[int], optional
+            The batch sizes to try (default is (8, 16, 32))
+        num_samples : int, optional
+            The number of arguments to time each configuration on (default is 64)
+        inter_op_threads : int, optional
+            The inter-op threads to set before tuning and to save with the configuration (default is None)
+
+        Returns
+        -------
+        tuple(dict, list[dict])
+            the fastest configuration, which is also applied to this process,
+            all tried configurations with their throughput in arguments per second
+        """
+    if thread_counts is None:
+        cpus = available_cpus()
+        thread_counts = sorted({1, cpus} | {2 ** i for i in range(1, cpus.bit_length()) if 2 ** i < cpus})
+    sample = dataframe.sample(n=min(num_samples, len(dataframe)), random_state=0).reset_index(drop=True)
+
+    apply_thread_config({'inter-op-threads': inter_op_threads})
+    model = load_cached_model(model_dir, num_labels=len(labels))
+    # warm up, so that the first timing does not include one-time initializations
+    predict_bert_logits(sample.head(min(batch_sizes)), model_dir, labels, model=model, batch_size=min(batch_sizes))
+
+    results = []
+
+    def measure(config):
+        apply_thread_config(config)
+        start = time.perf_counter()
+        predict_bert_logits(sample, model_dir, labels, model=model, batch_size=config['batch-size'])
+        seconds = time.perf_counter() - start
+        results.append(dict(config, **{'arguments-per-second': round(len(sample) / seconds, 2)}))
+        return seconds
+
+    best_config, best_seconds = None, float('inf')
+    for num_threads in thread_counts:
+        for batch_size in batch_sizes:
+            config = {'intra-op-threads': num_threads, 'inter-op-threads': inter_op_threads,
+                      'blas-threads': num_threads, 'batch-size': batch_size}
+            seconds = measure(config)
+            if seconds < best_seconds:
+                best_config, best_seconds = config, seconds
+
+    if best_config['inter-op-threads'] is None:
+        del best_config['inter-op-threads']
+    apply_thread_config(best_config)
+    return best_config, results
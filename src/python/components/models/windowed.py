@@ -0,0 +1,249 @@
+import time
+
+import torch
+import numpy as np
+
+from sklearn.metrics import f1_score
+
+from .bert import (get_tokenizer, load_cached_model)
+
+
+def encode_windows(premises, window_size, window_overlap=None, max_length=None):
+    """
+        Tokenizes the premises into windows of at most `window_size` tokens
+
+        Parameters
+        ----------
+        premises : list[str]
+            The premises to tokenize
+        window_size : int
+            The maximal number of tokens per window, including the special tokens
+        window_overlap : int, optional
+            The number of tokens shared by consecutive windows of a premise (default is None to truncate each premise
+            to a single window)
+        max_length : int, optional
+            The maximal number of tokens the model accepts, like its `max_position_embeddings` (default is None for the
+            tokenizer's limit only)
+
+        Returns
+        -------
+        tuple(list[list[int]], np.ndarray)
+            the token ids of each window,
+            the index of the premise of each window
+
+        Raises
+        ------
+        ValueError
+            if the window size exceeds the tokenizer's or the model's maximal length, or the window overlap does not
+            fit the window size
+        """
+    tokenizer = get_tokenizer()
+    if max_length is None or tokenizer.model_max_length < max_length:
+        max_length = tokenizer.model_max_length
+    if window_size > max_length:
+        raise ValueError('The window size %d exceeds the maximal length of %d tokens of the model'
+                         % (window_size, max_length))
+    if window_overlap is None:
+        encoded = tokenizer(premises, truncation=True, max_length=window_size)
+        return encoded['input_ids'], np.arange(len(premises))
+
+    if window_overlap < 0 or window_overlap >= window_size - tokenizer.num_special_tokens_to_add():
+        raise ValueError('The window overlap has to be at least 0 and less than the window size minus %d special '
+                         'tokens' % tokenizer.num_special_tokens_to_add())
+    encoded = tokenizer(premises, truncation=True, max_length=window_size, stride=window_overlap,
+                        return_overflowing_tokens=True)
+    return encoded['input_ids'], np.asarray(encoded['overflow_to_sample_mapping'])
+
+
+def infer_windows(model, window_ids, batch_size=32):
+    """
+        Computes the logits of each window, packing the windows of all premises into shared batches
+
+        The windows are sorted by length, so that each batch holds windows of about the same length and is padded only
+        to its longest window.
+
+        Parameters
+        ----------
+        model : PreTrainedModel
+            The Bert model to use
+        window_ids : list[list[int]]
+            The token ids of each window
+        batch_size : int, optional
+            The number of windows per forward pass (default is 32)
+
+        Returns
+        -------
+        tuple(np.ndarray, int, int)
+            the logits of each window,
+            the number of processed tokens including padding,
+            the sum over all batches of the batch size times the squared padded length, to which the attention cost is
+            proportional
+        """
+    pad_token_id = get_tokenizer().pad_token_id
+    window_logits = np.zeros((len(window_ids), model.config.num_labels), dtype=np.float32)
+    order = np.argsort([len(ids) for ids in window_ids], kind='stable')
+    num_tokens = 0
+    attention_cost = 0
+    with torch.no_grad():
+        for start in range(0, len(order), batch_size):
+            batch_indices = order[start:start + batch_size]
+            length = max(len(window_ids[i]) for i in batch_indices)
+            input_ids = np.full((len(batch_indices), length), pad_token_id, dtype=np.int64)
+            attention_mask = np.zeros((len(batch_indices), length), dtype=np.int64)
+            for row, i in enumerate(batch_indices):
+                input_ids[row, :len(window_ids[i])] = window_ids[i]
+                attention_mask[row, :len(window_ids[i])] = 1
+            batch = {'input_ids': torch.from_numpy(input_ids).to(model.device),
+                     'attention_mask': torch.from_numpy(attention_mask).to(model.device)}
+            window_logits[batch_indices] = model(**batch).logits.cpu().numpy()
+            num_tokens += input_ids.size
+            attention_cost += len(batch_indices) * length ** 2
+    return window_logits, num_tokens, attention_cost
+
+
+def pool_windows(window_logits, sample_mapping, num_premises, pooling='max'):
+    """
+        Pools the logits of the windows of each premise into one row of logits per premise
+
+        Parameters
+        ----------
+        window_logits : np.ndarray
+            The logits of each window
+        sample_mapping : np.ndarray
+            The index of the premise of each window
+        num_premises : int
+            The number of premises
+        pooling : str, optional
+            "max" to predict a label if any window does, or "mean" to average the windows (default is "max")
+
+        Returns
+        -------
+        np.ndarray
+            numpy nd-array of shape (num_premises, n_labels) with the pooled logits
+        """
+    if pooling == 'max':
+        logits = np.full((num_premises, window_logits.shape[1]), -np.inf, dtype=np.float32)
+        np.maximum.at(logits, sample_mapping, window_logits)
+        return logits
+    if pooling == 'mean':
+        logits = np.zeros((num_premises, window_logits.shape[1]), dtype=np.float32)
+        np.add.at(logits, sample_mapping, window_logits)
+        return logits / np.maximum(np.bincount(sample_mapping, minlength=num_premises), 1)[:, np.newaxis]
+    raise ValueError('Unknown pooling "%s"' % pooling)
+
+
+def predict_bert_logits_windowed(dataframe, model_dir, labels, window_size=128, window_overlap=32, batch_size=32,
+                                 pooling='max', model=None):
+    """
+        Computes the logits of the Bert model stored in `model_dir` for each argument from overlapping windows
+
+        Each premise is split into windows of at most `window_size` tokens, so that long premises are read completely
+        instead of being truncated, while the attention cost grows only with the window size. The logits of the
+        windows of each argument are pooled into one row.
+
+        Parameters
+        ----------
+        dataframe : pd.DataFrame
+            The arguments to be classified
+        model_dir : str
+            The directory of the pre-trained Bert model to use
+        labels : list[str]
+            The labels to predict
+        window_size : int, optional
+            The maximal number of tokens per window, including the special tokens (default is 128)
+        window_overlap : int, optional
+            The number of tokens shared by consecutive windows of a premise (default is 32)
+        batch_size : int, optional
+            The number of windows per forward pass (default is 32)
+        pooling : str, optional
+            "max" to predict a label if any window does, or "mean" to average the windows (default is "max")
+        model : PreTrainedModel, optional
+            An already loaded model to use instead of the one in `model_dir` (default is None)
+
+        Returns
+        -------
+        np.ndarray
+            numpy nd-array of shape (n_arguments, n_labels) with the pooled logits
+        """
+    if model is None:
+        model = load_cached_model(model_dir, num_labels=len(labels))
+    premises = dataframe['Premise'].tolist()
+    window_ids, sample_mapping = encode_windows(premises, window_size, window_overlap,
+                                                max_length=model.config.max_position_embeddings)
+    window_logits, _, _ = infer_windows(model, window_ids, batch_size=batch_size)
+    return pool_windows(window_logits, sample_mapping, len(premises), pooling=pooling)
+
+
+def predict_bert_model_windowed(dataframe, model_dir, labels, window_size=128, window_overlap=32, batch_size=32,
+                                pooling='max', model=None):
+    """
+        Classifies each argument using the Bert model stored in `model_dir` on overlapping windows of its premise
+
+        Parameters are those of `predict_bert_logits_windowed`.
+
+        Returns
+        -------
+        np.ndarray
+            numpy nd-array with the predictions given by the model
+        """
+    return 1 * (predict_bert_logits_windowed(dataframe, model_dir, labels, window_size=window_size,
+                                             window_overlap=window_overlap, batch_size=batch_size, pooling=pooling,
+                                             model=model) > 0.5)
+
+
+def benchmark_windowed(dataframe, model_dir, labels, window_sizes=(64, 128, 256), window_overlap=32, batch_size=32):
+    """
+        Compares the cost of windowed prediction against truncating each premise to a single window
+
+        Parameters
+        ----------
+        dataframe : pd.DataFrame
+            The arguments to benchmark on, optionally with the true labels
+        model_dir : str
+            The directory of the pre-trained Bert model to use
+        labels : list[str]
+            The labels to predict
+        window_sizes : tuple[int], optional
+            The window sizes to compare (default is (64, 128, 256))
+        window_overlap : int, optional
+            The number of tokens shared by consecutive windows (default is 32)
+        batch_size : int, optional
+            The number of windows per forward pass (default is 32)
+
+        Returns
+        -------
+        list[dict]
+            for truncation at the model's maximum length, and for truncation and windows at each window size: the
+            number of windows, processed tokens and relative attention cost, the throughput, the agreement with
+            truncation at the maximum length, and the macro F1-score if the true labels are available
+        """
+    model = load_cached_model(model_dir, num_labels=len(labels))
+    premises = dataframe['Premise'].tolist()
+    y_true = dataframe[labels].to_numpy(dtype=int) if set(labels).issubset(set(dataframe.columns.values)) else None
+    max_length = min(get_tokenizer().model_max_length, model.config.max_position_embeddings)
+
+    # warm up, so that the first timing does not include one-time initializations
+    infer_windows(model, encode_windows(premises[:batch_size], max_length)[0], batch_size=batch_size)
+
+    def measure(mode, window_size, overlap):
+        start = time.perf_counter()
+        window_ids, sample_mapping = encode_windows(premises, window_size, overlap, max_length=max_length)
+        window_logits, num_tokens, attention_cost = infer_windows(model, window_ids, batch_size=batch_size)
+        prediction = 1 * (pool_windows(window_logits, sample_mapping, len(premises)) > 0.5)
+        seconds = time.perf_counter() - start
+        result = {'mode': mode, 'window-size': window_size, 'windows': len(window_ids), 'tokens': num_tokens,
+                  'attention-cost': attention_cost, 'arguments-per-second': round(len(premises) / seconds, 2)}
+        if y_true is not None:
+            result['f1-score'] = round(f1_score(y_true, prediction, average='macro', zero_division=0), 3)
+        return result, prediction
+
+    baseline, baseline_prediction = measure('truncation', max_length, None)
+    baseline.update({'relative-attention-cost': 1.0, 'agreement': 1.0})
+    results = [baseline]
+    for window_size in window_sizes:
+        for mode, overlap in [('truncation', None), ('windows', window_overlap)]:
+            result, prediction = measure(mode, window_size, overlap)
+            result['relative-attention-cost'] = round(result['attention-cost'] / max(baseline['attention-cost'], 1), 3)
+            result['agreement'] = round(float((prediction == baseline_prediction).mean()), 4)
+            results.append(result)
+    return results
@@ -9,6 +9,8 @@
         Load content of json-file
     load_arguments_from_tsv(filepath, default_usage='test'):
         Reads arguments from tsv file
+    iterate_arguments_from_tsv(filepath, chunksize, default_usage='test'):
+        Reads arguments from tsv file in chunks
     load_labels_from_tsv(filepath, label_order):
         Reads label annotations from tsv file
     combine_columns(df_arguments, df_labels):
@@ -17,14 +19,22 @@
         Splits `DataFrame` by column `Usage` into `train`-, `validation`-, and `test`-arguments
     create_dataframe_head(argument_ids, model_name):
         Creates `DataFrame` usable to append predictions to it
+    deduplicate_premises(dataframe):
+        Reduces `DataFrame` to one argument per distinct normalized premise
+    expand_predictions(predictions, inverse):
+        Scatters predictions for deduplicated arguments back to all arguments
     write_tsv_dataframe(filepath, dataframe):
         Stores `DataFrame` in given tsv file
+    append_tsv_dataframe(filepath, dataframe, header=False):
+        Appends `DataFrame` to given tsv file
 
     Exceptions
     ----------
     MissingColumnError:
         Error indicating that an imported DataFrame lacks necessary columns
     """
-from .import_dataset import (load_values_from_json, load_json_file, load_arguments_from_tsv, load_labels_from_tsv, MissingColumnError)
-from .format_dataset import (combine_columns, split_arguments, create_dataframe_head)
-from .export_dataset import (write_tsv_dataframe)
+from .import_dataset import (load_values_from_json, load_json_file, load_arguments_from_tsv, iterate_arguments_from_tsv,
+                             load_labels_from_tsv, MissingColumnError)
+from .format_dataset import (combine_columns, split_arguments, create_dataframe_head, deduplicate_premises,
+                             expand_predictions)
+from .export_dataset import (write_tsv_dataframe, append_tsv_dataframe)
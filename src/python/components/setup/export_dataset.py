@@ -24,3 +24,25 @@ def write_tsv_dataframe(filepath, dataframe):
         dataframe.to_csv(filepath, encoding='utf-8', sep='\t', index=False, header=True, quoting=csv.QUOTE_NONE)
     except IOError:
         traceback.print_exc()
+
+
+def append_tsv_dataframe(filepath, dataframe, header=False):
+    """
+        Appends `DataFrame` to tsv file
+
+        Parameters
+        ----------
+        filepath : str
+            Path to tsv file
+        dataframe : pd.DataFrame
+            DataFrame to append
+        header : bool, optional
+            Whether to write the column names (default is False)
+
+        Raises
+        ------
+        IOError
+            if the file can't be opened or written, so that no appended part goes missing unnoticed
+    """
+    dataframe.to_csv(filepath, mode='a', encoding='utf-8', sep='\t', index=False, header=header,
+                     quoting=csv.QUOTE_NONE)
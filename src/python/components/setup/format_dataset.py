@@ -35,3 +35,37 @@ def create_dataframe_head(argument_ids, model_name):
     df_model_head['Method'] = [model_name] * len(argument_ids)
 
     return df_model_head
+
+
+def normalize_premise(premise):
+    """Lower-cases the premise and collapses its whitespace, which does not change the input of the uncased models"""
+    return ' '.join(str(premise).split()).lower()
+
+
+def deduplicate_premises(dataframe):
+    """
+        Reduces the arguments to one argument per distinct normalized "Premise"
+
+        Parameters
+        ----------
+        dataframe : pd.DataFrame
+            The arguments to deduplicate
+
+        Returns
+        -------
+        tuple(pd.DataFrame, np.ndarray)
+            the first argument of each distinct premise in order of appearance,
+            the row of the deduplicated `DataFrame` for each row of `dataframe`
+    """
+    keys = dataframe['Premise'].map(normalize_premise)
+    inverse, _ = pd.factorize(keys)
+    df_unique = dataframe.loc[~keys.duplicated()].reset_index(drop=True)
+
+    return df_unique, inverse
+
+
+def expand_predictions(predictions, inverse):
+    """Scatters the predictions for deduplicated arguments back to all rows, using the `inverse` of `deduplicate_premises`"""
+    if isinstance(predictions, pd.DataFrame):
+        return predictions.iloc[inverse].reset_index(drop=True)
+    return predictions[inverse]
@@ -70,6 +70,43 @@ def load_arguments_from_tsv(filepath, default_usage='test'):
         raise
 
 
+def iterate_arguments_from_tsv(filepath, chunksize, default_usage='test'):
+    """
+        Reads arguments from tsv file in chunks
+
+        Parameters
+        ----------
+        filepath : str
+            The path to the tsv file
+        chunksize : int
+            The number of arguments per chunk
+        default_usage : str, optional
+            The default value if the column "Usage" is missing
+
+        Returns
+        -------
+        iterator[pd.DataFrame]
+            the DataFrames with the arguments of each chunk, read while iterating
+
+        Raises
+        ------
+        MissingColumnError
+            if the required columns "Argument ID" or "Premise" are missing in the read data
+        IOError
+            if the file can't be read
+        """
+    try:
+        for dataframe in pd.read_csv(filepath, encoding='utf-8', sep='\t', header=0, chunksize=chunksize):
+            if not {'Argument ID', 'Premise'}.issubset(set(dataframe.columns.values)):
+                raise MissingColumnError('The argument "%s" file does not contain the minimum required columns [Argument ID, Premise].' % filepath)
+            if 'Usage' not in dataframe.columns.values:
+                dataframe['Usage'] = [default_usage] * len(dataframe)
+            yield dataframe
+    except IOError:
+        traceback.print_exc()
+        raise
+
+
 def load_labels_from_tsv(filepath, label_order):
     """
         Reads label annotations from tsv file
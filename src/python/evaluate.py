@@ -0,0 +1,79 @@
+import sys
+import getopt
+import os
+import csv
+import pandas as pd
+
+from components.setup import (load_arguments_from_tsv)
+from components.evaluation import (evaluate_predictions)
+
+help_string = '\nUsage:  evaluate.py [OPTIONS]' \
+              '\n' \
+              '\nEvaluate the specified predictions in regards to Precision, Recall, F1 and Accuracy.' \
+              '\nThe scores are calculated for each model every label individually with the mean score for each level.' \
+              '\n' \
+              '\nOptions:' \
+              '\n  -a, --absent-labels       Include absent labels from the test dataset into validation' \
+              '\n  -d, --data-dir string     Directory with the prediction and argument files (default' \
+              '\n                            WORKING_DIR/webis-argvalues-22/)' \
+              '\n  -h, --help                Display help text' \
+              '\n  -p, --predictions string  Predictions file with predictions to evaluate (default' \
+              '\n                            WORKING_DIR/predictions.tsv)'
+
+
+def main(argv):
+    # default values
+    data_dir = './webis-argvalues-22/'
+    prediction_filepath = './predictions.tsv'
+    absent_labels = False
+    levels = ["1", "2", "3", "4a", "4b"]
+
+    try:
+        opts, args = getopt.gnu_getopt(argv, "ad:hp:", ["absent-labels", "data-dir=", "help", "predictions="])
+    except getopt.GetoptError:
+        print(help_string)
+        sys.exit(2)
+    for opt, arg in opts:
+        if opt in ('-h', '--help'):
+            print(help_string)
+            sys.exit()
+        elif opt in ('-a', '--absent-labels'):
+            absent_labels = True
+        elif opt in ('-d', '--data-dir'):
+            data_dir = arg
+        elif opt in ('-p', '--predictions'):
+            prediction_filepath = arg
+
+    argument_filepath = os.path.join(data_dir, 'arguments.tsv')
+    if not os.path.isfile(prediction_filepath):
+        print('The specified prediction file does not exist.')
+        sys.exit(2)
+    if not os.path.isfile(argument_filepath):
+        print('The required file "arguments.tsv" is not present in the data directory')
+        sys.exit(2)
+
+    # progress is reported on stderr, so that stdout only contains the evaluation table
+    print('===> Loading files...', file=sys.stderr)
+    df_arguments = load_arguments_from_tsv(argument_filepath)
+    df_predictions = pd.read_csv(prediction_filepath, encoding='utf-8', sep='\t', header=0)
+
+    label_dataframes = {}
+    for level in levels:
+        label_filepath = os.path.join(data_dir, 'labels-level{}.tsv'.format(level))
+        if os.path.isfile(label_filepath):
+            label_dataframes[level] = pd.read_csv(label_filepath, encoding='utf-8', sep='\t', header=0)
+        else:
+            print('No file for level {} found.'.format(level), file=sys.stderr)
+
+    print('===> Evaluating predictions...', file=sys.stderr)
+    df_evaluation = evaluate_predictions(df_arguments, df_predictions, label_dataframes, absent_labels=absent_labels)
+    if len(df_evaluation) == 0:
+        print("For all levels the required files were either absent or don't apply on the predictions. "
+              "No evaluation can be made.", file=sys.stderr)
+        sys.exit()
+
+    df_evaluation.to_csv(sys.stdout, sep='\t', index=False, header=True, quoting=csv.QUOTE_NONE, na_rep='NaN')
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
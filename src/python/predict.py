@@ -1,25 +1,322 @@
 import sys
 import getopt
 import os
+import time
 import pandas as pd
 
-from components.setup import (load_values_from_json, load_arguments_from_tsv, split_arguments,
-                              write_tsv_dataframe, create_dataframe_head)
-from components.models import (predict_bert_model, predict_one_baseline, predict_svm)
+from components.setup import (load_values_from_json, load_arguments_from_tsv, iterate_arguments_from_tsv, split_arguments,
+                              write_tsv_dataframe, append_tsv_dataframe, create_dataframe_head, deduplicate_premises,
+                              expand_predictions, MissingColumnError)
+from components.models import (predict_bert_model, predict_bert_model_sharded, predict_one_baseline, predict_svm,
+                               predict_student_model, update_embedding_store, predict_linear_heads, predict_cascade,
+                               predict_svm_decision, predict_bert_pipelined, ModelBundle, locate_svm_model_file,
+                               load_thread_config, apply_thread_config, model_registry, predict_bert_model_windowed)
+from components.models.bert import (get_tokenizer, set_tokenizer)
 
 help_string = '\nUsage:  predict.py [OPTIONS]' \
               '\n' \
-              '\nRequest prediction of the BERT model (and optional SVM / 1-Baseline) for all test arguments' \
+              '\nRequest prediction of the BERT model (and optional SVM / distilled student / 1-Baseline) for all test' \
+              '\narguments' \
               '\n' \
               '\nOptions:' \
-              '\n  -c, --classifier string  Select classifier: "b" for Bert, "s" for SVM, "o" for 1-Baseline,' \
-              '\n                           or combination like "so" (default "b")' \
+              '\n  -c, --classifier string  Select classifier: "b" for Bert, "s" for SVM, "d" for the student distilled' \
+              '\n                           from Bert, "e" for linear heads on stored Bert embeddings, "c" for the' \
+              '\n                           SVM-Bert cascade, "o" for 1-Baseline, or combination like "so" (default' \
+              '\n                           "b")' \
+              '\n      --cascade-band float Distance to the SVM threshold within which the cascade considers a label' \
+              '\n                           uncertain and takes it from Bert (default 0.5)' \
+              '\n      --cascade-min-uncertain int' \
+              '\n                           Number of uncertain labels from which the cascade passes an argument on' \
+              '\n                           to Bert (default 3)' \
               '\n  -d, --data-dir string    Directory with the argument files (default "/data/")' \
+              '\n  -e, --embedding-dir string' \
+              '\n                           Directory of the embedding store that the "e" classifier reads and adds' \
+              '\n                           unseen arguments to (default "embeddings" in the output directory)' \
               '\n  -h, --help               Display help text' \
+              '\n      --manifest string    File listing one data directory and output directory per line, separated by' \
+              '\n                           a tab, to predict all of them in one run with the models loaded once;' \
+              '\n                           relative paths are relative to the manifest; replaces --data-dir and' \
+              '\n                           --output-dir' \
               '\n  -l, --levels string      Comma-separated list of taxonomy levels to train models for (default' \
               '\n                           "1,2,3,4a,4b")' \
-              '\n  -m, --model-dir string   Directory for saving the trained models (default "/models/")' \
-              '\n  -o, --output-dir string  Directory to write the "predictions.tsv" into (default "/output/")'
+              '\n  -m, --model-dir string   Directory with the trained models, or a model bundle file created by' \
+              '\n                           bundle.py (only for the classifiers "b", "s" and "o") (default' \
+              '\n                           "/models/")' \
+              '\n  -o, --output-dir string  Directory to write the "predictions.tsv" into (default "/output/")' \
+              '\n  -p, --pipeline           Predict with Bert in chunks, overlapping reading and tokenizing of the next' \
+              '\n                           chunk, loading of the next level\'s model, inference, and writing; only' \
+              '\n                           other classifiers load all arguments at once (not with workers)' \
+              '\n      --chunk-size int     Number of arguments per chunk of the pipeline (default 1000)' \
+              '\n      --window-size int    Predict with Bert on windows of this many tokens, which overlap for long' \
+              '\n                           premises, instead of truncating the premises; at most the model\'s' \
+              '\n                           maximal length (not with pipeline or workers)' \
+              '\n      --window-overlap int Number of tokens shared by consecutive windows, only with --window-size' \
+              '\n                           (default 32)' \
+              '\n      --verify-bundle      Check the checksums of the model bundle before predicting' \
+              '\n  -w, --workers int        Number of CPU processes to shard the Bert prediction across (default 1)' \
+              '\n      --thread-config string' \
+              '\n                           File with the thread configuration saved by tune.py; the options below' \
+              '\n                           take precedence' \
+              '\n      --threads int        Number of torch intra-op threads (per worker with --workers)' \
+              '\n      --interop-threads int' \
+              '\n                           Number of torch inter-op threads' \
+              '\n      --blas-threads int   Number of threads of the BLAS libraries used by numpy and scikit-learn' \
+              '\n      --tokenizer-parallelism string' \
+              '\n                           Whether the tokenizer runs in parallel: "true" or "false"' \
+              '\n      --batch-size int     Number of arguments per BERT forward pass (default 8)'
+
+# classifiers of predict_corpus
+classifier_names = ['bert', 'svm', 'one-baseline', 'student', 'heads', 'cascade']
+
+# options of predict_corpus: the cascade's distance to the SVM threshold within which labels are uncertain and its number
+# of uncertain labels from which arguments are passed on to Bert, the number of CPU processes to shard Bert across and
+# their intra-op threads, whether to predict with Bert in overlapping chunks and their number of arguments, the number
+# of tokens per window for windowed Bert prediction (None for truncation) and shared by consecutive windows, the number
+# of arguments per Bert forward pass, and the directory of the embedding store (None for "embeddings" in the output
+# directory)
+default_prediction_options = {'cascade-band': 0.5, 'cascade-min-uncertain': 3, 'workers': 1, 'threads-per-worker': None,
+                              'pipeline': False, 'chunk-size': 1000, 'window-size': None, 'window-overlap': 32,
+                              'batch-size': 8, 'embedding-dir': None}
+
+# thread options and the keys of the thread configuration they set
+thread_options = {'--threads': 'intra-op-threads', '--interop-threads': 'inter-op-threads',
+                  '--blas-threads': 'blas-threads', '--batch-size': 'batch-size'}
+
+
+def load_manifest(manifest_filepath):
+    """Returns the pairs of data and output directory listed in the manifest, skipping empty lines and "#" comments"""
+    manifest_dir = os.path.dirname(os.path.abspath(manifest_filepath))
+    corpora = []
+    with open(manifest_filepath, 'r', encoding='utf-8') as f:
+        for line_number, line in enumerate(f, start=1):
+            line = line.strip()
+            if len(line) == 0 or line.startswith('#'):
+                continue
+            fields = line.split('\t')
+            if len(fields) != 2:
+                raise ValueError('Line %d of manifest "%s" does not contain a data and an output directory separated '
+                                 'by a tab' % (line_number, manifest_filepath))
+            corpora.append(tuple(os.path.join(manifest_dir, field.strip()) for field in fields))
+    return corpora
+
+
+def _predict_corpus(data_dir, output_dir, output_filepath, levels, model_dir, classifiers, options, bundle):
+    """Predicts the test arguments in `data_dir` like `predict_corpus`, but writes them into `output_filepath`"""
+    classifiers = dict(dict.fromkeys(classifier_names, False), **classifiers)
+    options = dict(default_prediction_options, **(options if options is not None else {}))
+
+    # Check data directory
+    if not os.path.isdir(data_dir):
+        raise ValueError('The specified data directory "%s" does not exist' % data_dir)
+
+    argument_filepath = os.path.join(data_dir, 'arguments.tsv')
+    values_filepath = os.path.join(data_dir, 'values.json')
+
+    if not os.path.isfile(argument_filepath):
+        raise ValueError('The required file "arguments.tsv" is not present in the data directory')
+    if not os.path.isfile(values_filepath):
+        raise ValueError('The required file "values.json" is not present in the data directory')
+
+    values = load_values_from_json(values_filepath)
+    num_levels = len(levels)
+
+    # check levels
+    for i in range(num_levels):
+        if levels[i] not in values:
+            raise ValueError('Missing attribute "{}" in value.json'.format(levels[i]))
+        if bundle is not None and levels[i] in bundle.levels and bundle.labels(levels[i]) != list(values[levels[i]]):
+            raise ValueError('The labels of level "{}" in the model bundle differ from those in value.json'
+                             .format(levels[i]))
+
+    prediction_frames = []
+
+    # predict with Bert model in overlapping chunks, streaming the arguments from and the predictions into the files
+    num_pipelined = 0
+    if classifiers['bert'] and options['pipeline']:
+        print("===> Bert: Predicting all levels in pipelined chunks...")
+        label_columns = [label for level in levels for label in values[level]]
+        write_tsv_dataframe(output_filepath, pd.DataFrame(columns=['Argument ID', 'Method'] + label_columns))
+        chunks = (split_arguments(df_chunk)[2]
+                  for df_chunk in iterate_arguments_from_tsv(argument_filepath, options['chunk-size']))
+        num_pipelined, num_unique = predict_bert_pipelined(
+            chunks, [os.path.join(model_dir, 'bert_train_level{}'.format(level)) for level in levels],
+            [values[level] for level in levels], lambda df_chunk: append_tsv_dataframe(output_filepath, df_chunk),
+            batch_size=options['batch-size'])
+        num_duplicates = num_pipelined - num_unique
+        print("===> Deduplication: %d distinct premises in %d arguments, skipping %d duplicates (%.1f%%) within chunks"
+              % (num_unique, num_pipelined, num_duplicates, 100.0 * num_duplicates / max(num_pipelined, 1)))
+        # only the other classifiers need all arguments at once
+        if not any(classifiers[name] for name in classifier_names if name != 'bert'):
+            return num_pipelined
+
+    # load arguments
+    df_arguments = load_arguments_from_tsv(argument_filepath)
+    if len(df_arguments) < 1:
+        raise ValueError('There are no arguments in file "%s"' % argument_filepath)
+
+    # format dataset
+    _, _, df_test = split_arguments(df_arguments)
+
+    if len(df_test) < 1:
+        print('There are no arguments listed for prediction.')
+        return num_pipelined
+
+    # score each distinct premise only once and scatter the results back to all arguments
+    df_unique, unique_inverse = deduplicate_premises(df_test)
+    num_duplicates = len(df_test) - len(df_unique)
+    print("===> Deduplication: %d distinct premises in %d arguments, skipping %d duplicates (%.1f%%)"
+          % (len(df_unique), len(df_test), num_duplicates, 100.0 * num_duplicates / len(df_test)))
+
+    # predict with Bert model
+    if classifiers['bert'] and not options['pipeline']:
+        df_bert = create_dataframe_head(df_test['Argument ID'], model_name='Bert')
+        for i in range(num_levels):
+            print("===> Bert: Predicting Level %s..." % levels[i])
+            bert_dir = os.path.join(model_dir, 'bert_train_level{}'.format(levels[i]))
+            if options['window-size'] is not None:
+                result = predict_bert_model_windowed(
+                    df_unique, bert_dir, values[levels[i]], window_size=options['window-size'],
+                    window_overlap=options['window-overlap'], batch_size=options['batch-size'],
+                    model=bundle.bert_model(levels[i]) if bundle is not None else None)
+            elif bundle is not None:
+                result = predict_bert_model(df_unique, None, values[levels[i]], model=bundle.bert_model(levels[i]),
+                                            batch_size=options['batch-size'])
+            elif options['workers'] > 1:
+                result = predict_bert_model_sharded(df_unique, bert_dir, values[levels[i]], options['workers'],
+                                                    threads_per_worker=options['threads-per-worker'],
+                                                    batch_size=options['batch-size'])
+            else:
+                result = predict_bert_model(df_unique, bert_dir, values[levels[i]],
+                                            batch_size=options['batch-size'])
+            result = expand_predictions(result, unique_inverse)
+            df_bert = pd.concat([df_bert, pd.DataFrame(result, columns=values[levels[i]])], axis=1)
+        prediction_frames.append(df_bert)
+
+    # predict with SVM
+    if classifiers['svm']:
+        df_svm = create_dataframe_head(df_test['Argument ID'], model_name='SVM')
+        for i in range(num_levels):
+            print("===> SVM: Predicting Level %s..." % levels[i])
+            if bundle is not None:
+                decision_values = bundle.svm_weights(levels[i]).decision_function(df_unique['Premise'].tolist(),
+                                                                                   values[levels[i]])
+                result = predict_svm_decision(decision_values, values[levels[i]])
+            else:
+                result = predict_svm(df_unique, values[levels[i]],
+                                     os.path.join(model_dir, 'svm/svm_train_level{}_vectorizer.json'.format(levels[i])),
+                                     locate_svm_model_file(model_dir, levels[i]))
+            result = expand_predictions(result, unique_inverse)
+            df_svm = pd.concat([df_svm, result], axis=1)
+        prediction_frames.append(df_svm)
+
+    # predict with SVM, and with Bert for uncertain arguments
+    if classifiers['cascade']:
+        df_cascade = create_dataframe_head(df_test['Argument ID'], model_name='Cascade')
+        for i in range(num_levels):
+            print("===> Cascade: Predicting Level %s..." % levels[i])
+            result, bert_fraction = predict_cascade(
+                df_unique, values[levels[i]], os.path.join(model_dir, 'bert_train_level{}'.format(levels[i])),
+                os.path.join(model_dir, 'svm/svm_train_level{}_vectorizer.json'.format(levels[i])),
+                locate_svm_model_file(model_dir, levels[i]), band=options['cascade-band'],
+                min_uncertain=options['cascade-min-uncertain'])
+            print("Passed %.1f%% of the arguments on to Bert" % (100.0 * bert_fraction))
+            result = expand_predictions(result, unique_inverse)
+            df_cascade = pd.concat([df_cascade, result], axis=1)
+        prediction_frames.append(df_cascade)
+
+    # predict with distilled student model
+    if classifiers['student']:
+        df_student = create_dataframe_head(df_test['Argument ID'], model_name='Distilled')
+        for i in range(num_levels):
+            print("===> Student: Predicting Level %s..." % levels[i])
+            result = predict_student_model(df_unique, os.path.join(model_dir, 'student_train_level{}'.format(levels[i])),
+                                           values[levels[i]])
+            result = expand_predictions(result, unique_inverse)
+            df_student = pd.concat([df_student, pd.DataFrame(result, columns=values[levels[i]])], axis=1)
+        prediction_frames.append(df_student)
+
+    # predict with linear heads on stored embeddings
+    if classifiers['heads']:
+        print("===> Embeddings: Encoding unseen arguments...")
+        store = update_embedding_store(df_test, options['embedding-dir'] if options['embedding-dir'] is not None
+                                       else os.path.join(output_dir, 'embeddings'))
+        df_heads = create_dataframe_head(df_test['Argument ID'], model_name='Heads')
+        for i in range(num_levels):
+            print("===> Heads: Predicting Level %s..." % levels[i])
+            result = predict_linear_heads(df_test, store, values[levels[i]],
+                                          os.path.join(model_dir, 'heads/heads_train_level{}.npz'.format(levels[i])))
+            df_heads = pd.concat([df_heads, result], axis=1)
+        prediction_frames.append(df_heads)
+
+    # predict with 1-Baseline
+    if classifiers['one-baseline']:
+        df_one_baseline = create_dataframe_head(df_test['Argument ID'], model_name='1-Baseline')
+        for i in range(num_levels):
+            print("===> 1-Baseline: Predicting Level %s..." % levels[i])
+            result = predict_one_baseline(df_test, values[levels[i]])
+            df_one_baseline = pd.concat([df_one_baseline, result], axis=1)
+        prediction_frames.append(df_one_baseline)
+
+    # write predictions
+    print("===> Writing predictions...")
+    if classifiers['bert'] and options['pipeline']:
+        if len(prediction_frames) > 0:
+            append_tsv_dataframe(output_filepath, pd.concat(prediction_frames))
+    else:
+        write_tsv_dataframe(output_filepath, pd.concat(prediction_frames))
+
+    return len(df_test)
+
+
+def predict_corpus(data_dir, output_dir, levels, model_dir, classifiers, options=None, bundle=None):
+    """
+        Predicts the test arguments in `data_dir` with the selected classifiers and writes the "predictions.tsv" into
+        `output_dir`
+
+        Models are loaded through the model registry or the bundle, so that further corpora reuse them. The
+        predictions are written under a temporary name and renamed once complete, so that a failure leaves the
+        "predictions.tsv" of a previous run in place.
+
+        Parameters
+        ----------
+        data_dir : str
+            The directory with the argument files
+        output_dir : str
+            The directory to write the "predictions.tsv" into
+        levels : list[str]
+            The taxonomy levels to predict
+        model_dir : str
+            The directory with the trained models
+        classifiers : dict[str, bool]
+            Whether to predict with each of the classifiers "bert", "svm", "one-baseline", "student", "heads" and
+            "cascade"; missing ones are not run
+        options : dict, optional
+            The prediction options as in `default_prediction_options`, which provides the missing ones (default is
+            None for all defaults)
+        bundle : ModelBundle, optional
+            The model bundle to use instead of `model_dir` (default is None)
+
+        Returns
+        -------
+        int
+            the number of predicted arguments
+
+        Raises
+        ------
+        ValueError
+            if a required file is missing or lacks a level
+        """
+    output_filepath = os.path.join(output_dir, 'predictions.tsv')
+    partial_filepath = output_filepath + '.partial'
+    try:
+        num_arguments = _predict_corpus(data_dir, output_dir, partial_filepath, levels, model_dir, classifiers,
+                                        options, bundle)
+        if os.path.isfile(partial_filepath):
+            os.replace(partial_filepath, output_filepath)
+    finally:
+        if os.path.isfile(partial_filepath):
+            os.remove(partial_filepath)
+    return num_arguments
 
 
 def main(argv):
@@ -28,14 +325,33 @@ def main(argv):
     run_bert = True
     run_svm = False
     run_one_baseline = False
+    run_student = False
+    run_heads = False
+    run_cascade = False
+    cascade_band = 0.5
+    cascade_min_uncertain = 3
     data_dir = '/data/'
+    embedding_dir = None
+    manifest_filepath = None
     levels = ["1", "2", "3", "4a", "4b"]
     model_dir = '/models/'
     output_dir = '/output/'
+    num_workers = 1
+    pipeline = False
+    chunk_size = 1000
+    window_size = None
+    window_overlap = None
+    verify_bundle = False
+    thread_config = {}
+    thread_config_filepath = None
 
     try:
-        opts, args = getopt.gnu_getopt(argv, "c:d:hl:m:o:",
-                                       ["classifier=", "data-dir=", "help", "levels=", "model-dir=", "output-dir="])
+        opts, args = getopt.gnu_getopt(argv, "c:d:e:hl:m:o:pw:",
+                                       ["classifier=", "data-dir=", "embedding-dir=", "help", "levels=", "model-dir=",
+                                        "output-dir=", "pipeline", "workers=", "cascade-band=", "cascade-min-uncertain=",
+                                        "chunk-size=", "verify-bundle", "thread-config=", "threads=", "interop-threads=",
+                                        "blas-threads=", "tokenizer-parallelism=", "batch-size=", "manifest=",
+                                        "window-size=", "window-overlap="])
     except getopt.GetoptError:
         print(help_string)
         sys.exit(2)
@@ -47,111 +363,233 @@ def main(argv):
             run_bert = 'b' in arg.lower()
             run_svm = 's' in arg.lower()
             run_one_baseline = 'o' in arg.lower()
-            if not run_bert and not run_svm and not run_one_baseline:
+            run_student = 'd' in arg.lower()
+            run_heads = 'e' in arg.lower()
+            run_cascade = 'c' in arg.lower()
+            if not (run_bert or run_svm or run_one_baseline or run_student or run_heads or run_cascade):
                 print('No classifiers selected')
                 sys.exit(2)
         elif opt in ('-d', '--data-dir'):
             data_dir = arg
+        elif opt in ('-e', '--embedding-dir'):
+            embedding_dir = arg
+        elif opt == '--manifest':
+            manifest_filepath = arg
         elif opt in ('-l', '--levels'):
             levels = arg.split(",")
         elif opt in ('-m', '--model-dir'):
             model_dir = arg
         elif opt in ('-o', '--output-dir'):
             output_dir = arg
+        elif opt == '--cascade-band':
+            try:
+                cascade_band = float(arg)
+            except ValueError:
+                cascade_band = 0.0
+            if not cascade_band > 0:
+                print('The cascade band has to be a positive number')
+                sys.exit(2)
+        elif opt == '--cascade-min-uncertain':
+            try:
+                cascade_min_uncertain = int(arg)
+            except ValueError:
+                cascade_min_uncertain = 0
+            if cascade_min_uncertain < 1:
+                print('The minimal number of uncertain labels has to be a positive integer')
+                sys.exit(2)
+        elif opt in ('-p', '--pipeline'):
+            pipeline = True
+        elif opt == '--window-size':
+            try:
+                window_size = int(arg)
+            except ValueError:
+                window_size = 0
+            if window_size < 3:
+                print('The window size has to be an integer of at least 3')
+                sys.exit(2)
+        elif opt == '--window-overlap':
+            try:
+                window_overlap = int(arg)
+            except ValueError:
+                window_overlap = -1
+            if window_overlap < 0:
+                print('The window overlap has to be a non-negative integer')
+                sys.exit(2)
+        elif opt == '--chunk-size':
+            try:
+                chunk_size = int(arg)
+            except ValueError:
+                chunk_size = 0
+            if chunk_size < 1:
+                print('The chunk size has to be a positive integer')
+                sys.exit(2)
+        elif opt == '--verify-bundle':
+            verify_bundle = True
+        elif opt in ('-w', '--workers'):
+            try:
+                num_workers = int(arg)
+            except ValueError:
+                num_workers = 0
+            if num_workers < 1:
+                print('The number of workers has to be a positive integer')
+                sys.exit(2)
+        elif opt in thread_options:
+            try:
+                number = int(arg)
+            except ValueError:
+                number = 0
+            if number < 1:
+                print('The value of "%s" has to be a positive integer' % opt)
+                sys.exit(2)
+            thread_config[thread_options[opt]] = number
+        elif opt == '--tokenizer-parallelism':
+            if arg.lower() not in ('true', 'false'):
+                print('The tokenizer parallelism has to be "true" or "false"')
+                sys.exit(2)
+            thread_config['tokenizer-parallelism'] = arg.lower() == 'true'
+        elif opt == '--thread-config':
+            thread_config_filepath = arg
 
-    # Check data directory
-    if not os.path.isdir(data_dir):
-        print('The specified data directory "%s" does not exist' % data_dir)
+    # reject explicit thread options that none of the selected classifiers uses
+    if not (run_bert or run_student or run_heads or run_cascade):
+        for option, key in [('--threads', 'intra-op-threads'), ('--interop-threads', 'inter-op-threads'),
+                            ('--tokenizer-parallelism', 'tokenizer-parallelism')]:
+            if key in thread_config:
+                print('The option "%s" applies only to the classifiers "b", "d", "e" and "c"' % option)
+                sys.exit(2)
+    if 'batch-size' in thread_config and not run_bert:
+        print('The option "--batch-size" applies only to the classifier "b"')
         sys.exit(2)
 
-    argument_filepath = os.path.join(data_dir, 'arguments.tsv')
-    values_filepath = os.path.join(data_dir, 'values.json')
+    # apply the saved thread configuration, overridden by the explicit options, before any parallel work
+    if thread_config_filepath is not None:
+        if not os.path.isfile(thread_config_filepath):
+            print('The specified thread configuration "%s" does not exist' % thread_config_filepath)
+            sys.exit(2)
+        try:
+            thread_config = dict(load_thread_config(thread_config_filepath), **thread_config)
+        except ValueError as e:
+            print(e)
+            sys.exit(2)
+    apply_thread_config(thread_config)
+    batch_size = thread_config.get('batch-size', 8)
 
-    if not os.path.isfile(argument_filepath):
-        print('The required file "arguments.tsv" is not present in the data directory')
+    if num_workers > 1 and not run_bert:
+        print('The workers apply only to the classifier "b"')
         sys.exit(2)
-    if not os.path.isfile(values_filepath):
-        print('The required file "values.json" is not present in the data directory')
+    if pipeline and num_workers > 1:
+        print('The pipeline is not available with workers')
         sys.exit(2)
-
-    # load arguments
-    df_arguments = load_arguments_from_tsv(argument_filepath)
-    if len(df_arguments) < 1:
-        print('There are no arguments in file "%s"' % argument_filepath)
+    if window_size is not None and run_bert and (pipeline or num_workers > 1):
+        print('Windowed Bert prediction is not available with pipeline or workers')
+        sys.exit(2)
+    if window_size is not None and not run_bert:
+        print('The window size applies only to the classifier "b"')
+        sys.exit(2)
+    if window_overlap is not None and window_size is None:
+        print('The window overlap applies only with a window size')
+        sys.exit(2)
+    if window_overlap is None:
+        window_overlap = 32
+    if window_size is not None and window_overlap >= window_size - 2:
+        print('The window overlap has to be less than the window size minus the 2 special tokens')
         sys.exit(2)
 
-    values = load_values_from_json(values_filepath)
-    num_levels = len(levels)
-
-    # check levels
-    for i in range(num_levels):
-        if levels[i] not in values:
-            print('Missing attribute "{}" in value.json'.format(levels[i]))
+    # check model directory or bundle
+    bundle = None
+    if os.path.isfile(model_dir):
+        if run_student or run_heads or run_cascade or pipeline or num_workers > 1:
+            print('A model bundle supports only the classifiers "b", "s" and "o", without pipeline or workers')
             sys.exit(2)
-
-    # check model directory
-    if not os.path.isdir(model_dir):
+        try:
+            bundle = ModelBundle(model_dir, verify=verify_bundle)
+        except ValueError as e:
+            print(e)
+            sys.exit(2)
+        set_tokenizer(bundle.tokenizer())
+        for i in range(len(levels)):
+            if run_bert and not bundle.has_bert(levels[i]):
+                print('Missing Bert model for level "{}" in the model bundle'.format(levels[i]))
+                sys.exit(2)
+            if run_svm and not bundle.has_svm(levels[i]):
+                print('Missing SVM models for level "{}" in the model bundle'.format(levels[i]))
+                sys.exit(2)
+    elif not os.path.isdir(model_dir):
         print('The specified <model-dir> "%s" does not exist' % model_dir)
         sys.exit(2)
+    else:
+        for i in range(len(levels)):
+            if (run_bert or run_cascade) and not os.path.exists(os.path.join(model_dir, 'bert_train_level{}'.format(levels[i]))):
+                print('Missing saved Bert model for level "{}"'.format(levels[i]))
+                sys.exit(2)
+            if (run_svm or run_cascade) and (
+                    not os.path.exists(os.path.join(model_dir, 'svm/svm_train_level{}_vectorizer.json'.format(levels[i])))
+                    or not os.path.exists(locate_svm_model_file(model_dir, levels[i]))):
+                print('Missing saved SVM models for level "{}"'.format(levels[i]))
+                sys.exit(2)
+            if run_student and not os.path.exists(os.path.join(model_dir, 'student_train_level{}'.format(levels[i]))):
+                print('Missing saved student model for level "{}"'.format(levels[i]))
+                sys.exit(2)
+            if run_heads and not os.path.exists(os.path.join(model_dir, 'heads/heads_train_level{}.npz'.format(levels[i]))):
+                print('Missing saved linear heads for level "{}"'.format(levels[i]))
+                sys.exit(2)
 
-    for i in range(num_levels):
-        if run_bert and not os.path.exists(os.path.join(model_dir, 'bert_train_level{}'.format(levels[i]))):
-            print('Missing saved Bert model for level "{}"'.format(levels[i]))
+    # the windows have to fit the tokenizer, while predict_corpus checks them against each model
+    if window_size is not None and window_size > get_tokenizer().model_max_length:
+        print('The window size has to be at most the %d tokens of the tokenizer' % get_tokenizer().model_max_length)
+        sys.exit(2)
+
+    # list corpora
+    if manifest_filepath is not None:
+        if not os.path.isfile(manifest_filepath):
+            print('The specified manifest "%s" does not exist' % manifest_filepath)
             sys.exit(2)
-        if run_svm and (
-                not os.path.exists(os.path.join(model_dir, 'svm/svm_train_level{}_vectorizer.json'.format(levels[i])))
-                and not os.path.exists(os.path.join(model_dir, 'svm/svm_train_level{}_models.json'.format(levels[i])))):
-            print('Missing saved SVM models for level "{}"'.format(levels[i]))
+        try:
+            corpora = load_manifest(manifest_filepath)
+        except ValueError as e:
+            print(e)
             sys.exit(2)
+        if len(corpora) < 1:
+            print('There are no corpora listed in the manifest "%s"' % manifest_filepath)
+            sys.exit(2)
+    else:
+        corpora = [(data_dir, output_dir)]
 
-    # format dataset
-    _, _, df_test = split_arguments(df_arguments)
-
-    if len(df_test) < 1:
-        print('There are no arguments listed for prediction.')
-        sys.exit()
-
-    # predict with Bert model
-    if run_bert:
-        df_bert = create_dataframe_head(df_test['Argument ID'], model_name='Bert')
-        for i in range(num_levels):
-            print("===> Bert: Predicting Level %s..." % levels[i])
-            result = predict_bert_model(df_test, os.path.join(model_dir, 'bert_train_level{}'.format(levels[i])),
-                                        values[levels[i]])
-            df_bert = pd.concat([df_bert, pd.DataFrame(result, columns=values[levels[i]])], axis=1)
-        df_prediction = df_bert
-
-    # predict with SVM
-    if run_svm:
-        df_svm = create_dataframe_head(df_test['Argument ID'], model_name='SVM')
-        for i in range(num_levels):
-            print("===> SVM: Predicting Level %s..." % levels[i])
-            result = predict_svm(df_test, values[levels[i]],
-                                 os.path.join(model_dir, 'svm/svm_train_level{}_vectorizer.json'.format(levels[i])),
-                                 os.path.join(model_dir, 'svm/svm_train_level{}_models.json'.format(levels[i])))
-            df_svm = pd.concat([df_svm, result], axis=1)
-
-        if not run_bert:
-            df_prediction = df_svm
-        else:
-            df_prediction = pd.concat([df_prediction, df_svm])
+    classifiers = {'bert': run_bert, 'svm': run_svm, 'one-baseline': run_one_baseline, 'student': run_student,
+                   'heads': run_heads, 'cascade': run_cascade}
+    options = {'cascade-band': cascade_band, 'cascade-min-uncertain': cascade_min_uncertain, 'workers': num_workers,
+               'threads-per-worker': thread_config.get('intra-op-threads'), 'pipeline': pipeline,
+               'chunk-size': chunk_size, 'window-size': window_size, 'window-overlap': window_overlap,
+               'batch-size': batch_size, 'embedding-dir': embedding_dir}
 
-    # predict with 1-Baseline
-    if run_one_baseline:
-        df_one_baseline = create_dataframe_head(df_test['Argument ID'], model_name='1-Baseline')
-        for i in range(num_levels):
-            print("===> 1-Baseline: Predicting Level %s..." % levels[i])
-            result = predict_one_baseline(df_test, values[levels[i]])
-            df_one_baseline = pd.concat([df_one_baseline, result], axis=1)
-
-        if not run_bert and not run_svm:
-            df_prediction = df_one_baseline
-        else:
-            df_prediction = pd.concat([df_prediction, df_one_baseline])
+    # predict each corpus, keeping the models loaded for the next ones
+    timings = []
+    for corpus_index, (corpus_data_dir, corpus_output_dir) in enumerate(corpora):
+        if manifest_filepath is not None:
+            print("===> Corpus %d/%d: %s" % (corpus_index + 1, len(corpora), corpus_data_dir))
+            os.makedirs(corpus_output_dir, exist_ok=True)
+        start = time.perf_counter()
+        try:
+            num_arguments = predict_corpus(corpus_data_dir, corpus_output_dir, levels, model_dir, classifiers,
+                                           options=options, bundle=bundle)
+        except (ValueError, OSError, pd.errors.ParserError, MissingColumnError) as e:
+            print(e)
+            if manifest_filepath is None:
+                sys.exit(2)
+            timings.append({'data-dir': corpus_data_dir, 'status': 'failed'})
+            continue
+        seconds = time.perf_counter() - start
+        timings.append({'data-dir': corpus_data_dir, 'status': 'done', 'arguments': num_arguments,
+                        'seconds': round(seconds, 2),
+                        'arguments-per-second': round(num_arguments / seconds, 2) if seconds > 0 else None})
 
-    # write predictions
-    print("===> Writing predictions...")
-    write_tsv_dataframe(os.path.join(output_dir, 'predictions.tsv'), df_prediction)
+    if manifest_filepath is not None:
+        print("===> Timing per corpus:")
+        for timing in timings:
+            print(timing)
+        print("Models: %s" % model_registry.stats())
+        if any(timing['status'] == 'failed' for timing in timings):
+            sys.exit(1)
 
 
 if __name__ == '__main__':
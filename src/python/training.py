@@ -4,21 +4,48 @@ import os
 
 from components.setup import (load_values_from_json, load_arguments_from_tsv, load_labels_from_tsv,
                                                 combine_columns, split_arguments)
-from components.models import (train_bert_model, train_svm)
+from components.models import (train_bert_model, train_svm, compress_svm, train_student_model, benchmark_student_model,
+                               update_embedding_store, train_linear_heads, load_thread_config, apply_thread_config)
 
 help_string = '\nUsage:  training.py [OPTIONS]' \
               '\n' \
-              '\nTrain the BERT model (and optional SVM) on the arguments' \
+              '\nTrain the BERT model (and optional SVM / distilled student) on the arguments' \
               '\n' \
               '\nOptions:' \
-              '\n  -c, --classifier string  Select classifier: "b" for Bert, "s" for SVM, "bs" for both (default' \
-              '\n                           "b")' \
+              '\n  -c, --classifier string  Select classifier: "b" for Bert, "s" for SVM, "d" for a student distilled' \
+              '\n                           from the (trained) Bert, "e" for linear heads on stored frozen Bert' \
+              '\n                           embeddings, or combination like "bs" (default "b")' \
               '\n  -d, --data-dir string    Directory with the argument files (default "/data/")' \
+              '\n  -e, --embedding-dir string' \
+              '\n                           Directory of the embedding store for the "e" classifier (default' \
+              '\n                           "embeddings" in the model directory)' \
               '\n  -h, --help               Display help text' \
               '\n  -l, --levels string      Comma-separated list of taxonomy levels to train models for (default' \
               '\n                           "1,2,3,4a,4b")' \
               '\n  -m, --model-dir string   Directory for saving the trained models (default "/models/")' \
-              '\n  -v, --validate           Request evaluation after training'
+              '\n      --svm-threshold float' \
+              '\n                           Compress the SVMs, dropping weights with a smaller magnitude' \
+              '\n      --svm-top-k int      Compress the SVMs, keeping only the k largest weights per label' \
+              '\n      --svm-dtype string   Compress the SVMs, storing the weights as "float32" or "float16"' \
+              '\n                           (default "float32")' \
+              '\n  -u, --unlabelled-data string' \
+              '\n                           File with additional unlabelled arguments for distillation' \
+              '\n  -v, --validate           Request evaluation after training' \
+              '\n      --thread-config string' \
+              '\n                           File with the thread configuration saved by tune.py; the options below' \
+              '\n                           take precedence' \
+              '\n      --threads int        Number of torch intra-op threads (default by torch: all CPU cores)' \
+              '\n      --interop-threads int' \
+              '\n                           Number of torch inter-op threads' \
+              '\n      --blas-threads int   Number of threads of the BLAS libraries used by numpy and scikit-learn' \
+              '\n      --tokenizer-parallelism string' \
+              '\n                           Whether the tokenizer runs in parallel: "true" or "false"' \
+              '\n      --batch-size int     Number of arguments per BERT training step, not taken from the thread' \
+              '\n                           configuration (default 8)'
+
+# thread options and the keys of the thread configuration they set
+thread_options = {'--threads': 'intra-op-threads', '--interop-threads': 'inter-op-threads',
+                  '--blas-threads': 'blas-threads', '--batch-size': 'batch-size'}
 
 
 def main(argv):
@@ -26,13 +53,28 @@ def main(argv):
     curr_dir = os.getcwd()
     run_bert = True
     run_svm = False
+    run_distill = False
+    run_heads = False
     data_dir = '/data/'
+    embedding_dir = None
     levels = ["1", "2", "3", "4a", "4b"]
     model_dir = '/models/'
+    unlabelled_filepath = None
     validate = False
+    compress = False
+    svm_threshold = 0.0
+    svm_top_k = None
+    svm_dtype = 'float32'
+    thread_config = {}
+    thread_config_filepath = None
 
     try:
-        opts, args = getopt.gnu_getopt(argv, "c:d:hl:m:v", ["classifier=", "data-dir=", "help", "levels=", "model-dir=", "validate"])
+        opts, args = getopt.gnu_getopt(argv, "c:d:e:hl:m:u:v", ["classifier=", "data-dir=", "embedding-dir=", "help",
+                                                                "levels=", "model-dir=", "unlabelled-data=", "validate",
+                                                                "svm-threshold=", "svm-top-k=", "svm-dtype=",
+                                                                "thread-config=", "threads=", "interop-threads=",
+                                                                "blas-threads=", "tokenizer-parallelism=",
+                                                                "batch-size="])
     except getopt.GetoptError:
         print(help_string)
         sys.exit(2)
@@ -43,17 +85,92 @@ def main(argv):
         elif opt in ('-c', '--classifier'):
             run_bert = 'b' in arg.lower()
             run_svm = 's' in arg.lower()
-            if not run_bert and not run_svm:
+            run_distill = 'd' in arg.lower()
+            run_heads = 'e' in arg.lower()
+            if not run_bert and not run_svm and not run_distill and not run_heads:
                 print('No classifiers selected')
                 sys.exit(2)
         elif opt in ('-d', '--data-dir'):
             data_dir = arg
+        elif opt in ('-e', '--embedding-dir'):
+            embedding_dir = arg
         elif opt in ('-l', '--levels'):
             levels = arg.split(",")
         elif opt in ('-m', '--model-dir'):
             model_dir = arg
+        elif opt in ('-u', '--unlabelled-data'):
+            unlabelled_filepath = arg
         elif opt in ('-v', '--validate'):
             validate = True
+        elif opt == '--svm-threshold':
+            compress = True
+            try:
+                svm_threshold = float(arg)
+            except ValueError:
+                svm_threshold = -1.0
+            if svm_threshold < 0:
+                print('The SVM threshold has to be a non-negative number')
+                sys.exit(2)
+        elif opt == '--svm-top-k':
+            compress = True
+            try:
+                svm_top_k = int(arg)
+            except ValueError:
+                svm_top_k = 0
+            if svm_top_k < 1:
+                print('The SVM top-k has to be a positive integer')
+                sys.exit(2)
+        elif opt == '--svm-dtype':
+            compress = True
+            svm_dtype = arg.lower()
+            if svm_dtype not in ('float32', 'float16'):
+                print('The SVM dtype has to be "float32" or "float16"')
+                sys.exit(2)
+        elif opt in thread_options:
+            try:
+                number = int(arg)
+            except ValueError:
+                number = 0
+            if number < 1:
+                print('The value of "%s" has to be a positive integer' % opt)
+                sys.exit(2)
+            thread_config[thread_options[opt]] = number
+        elif opt == '--tokenizer-parallelism':
+            if arg.lower() not in ('true', 'false'):
+                print('The tokenizer parallelism has to be "true" or "false"')
+                sys.exit(2)
+            thread_config['tokenizer-parallelism'] = arg.lower() == 'true'
+        elif opt == '--thread-config':
+            thread_config_filepath = arg
+
+    # reject explicit options that none of the selected classifiers uses
+    if compress and not run_svm:
+        print('The options "--svm-threshold", "--svm-top-k" and "--svm-dtype" apply only to the classifier "s"')
+        sys.exit(2)
+    if not (run_bert or run_distill or run_heads):
+        for option, key in [('--threads', 'intra-op-threads'), ('--interop-threads', 'inter-op-threads'),
+                            ('--tokenizer-parallelism', 'tokenizer-parallelism')]:
+            if key in thread_config:
+                print('The option "%s" applies only to the classifiers "b", "d" and "e"' % option)
+                sys.exit(2)
+    if 'batch-size' in thread_config and not run_bert:
+        print('The option "--batch-size" applies only to the classifier "b"')
+        sys.exit(2)
+
+    # the tuned batch size is the fastest for prediction, but would change the training itself
+    batch_size = thread_config.get('batch-size', 8)
+
+    # apply the saved thread configuration, overridden by the explicit options, before any parallel work
+    if thread_config_filepath is not None:
+        if not os.path.isfile(thread_config_filepath):
+            print('The specified thread configuration "%s" does not exist' % thread_config_filepath)
+            sys.exit(2)
+        try:
+            thread_config = dict(load_thread_config(thread_config_filepath), **thread_config)
+        except ValueError as e:
+            print(e)
+            sys.exit(2)
+    apply_thread_config(thread_config)
 
     svm_dir = os.path.join(model_dir, 'svm')
 
@@ -66,7 +183,8 @@ def main(argv):
     if os.path.isfile(model_dir):
         print('The specified <model-dir> "%s" points to an existing file' % model_dir)
         sys.exit(2)
-    if os.path.isdir(model_dir) and len(os.listdir(model_dir)) > 0:
+    # the student and the linear heads extend an existing model directory, only Bert and SVM training overwrite it
+    if (run_bert or run_svm) and os.path.isdir(model_dir) and len(os.listdir(model_dir)) > 0:
         print('The specified <model-dir> "%s" already exists and contains files' % model_dir)
         decision = input('Do You still want to proceed? [y/n]\n').lower()
         if decision != 'y':
@@ -80,6 +198,13 @@ def main(argv):
         else:
             os.mkdir(svm_dir)
 
+    heads_dir = os.path.join(model_dir, 'heads')
+    if run_heads and not os.path.isdir(heads_dir):
+        if os.path.exists(heads_dir):
+            print('Unable to create heads directory at "%s"' % heads_dir)
+        else:
+            os.mkdir(heads_dir)
+
     argument_filepath = os.path.join(data_dir, 'arguments.tsv')
     value_json_filepath = os.path.join(data_dir, 'values.json')
 
@@ -90,6 +215,10 @@ def main(argv):
         print('The required file "values.json" is not present in the data directory')
         sys.exit(2)
 
+    if run_distill and unlabelled_filepath is not None and not os.path.isfile(unlabelled_filepath):
+        print('The specified unlabelled data file "%s" does not exist' % unlabelled_filepath)
+        sys.exit(2)
+
     # load arguments
     df_arguments = load_arguments_from_tsv(argument_filepath, default_usage='train')
     if len(df_arguments) < 1:
@@ -137,12 +266,13 @@ def main(argv):
             if validate:
                 bert_model_evaluation = train_bert_model(df_train_all[i],
                                                          os.path.join(model_dir, 'bert_train_level{}'.format(levels[i])),
-                                                         values[levels[i]], test_dataframe=df_valid_all[i])
+                                                         values[levels[i]], test_dataframe=df_valid_all[i],
+                                                         batch_size=batch_size)
                 print("F1-Scores for Level %s:" % levels[i])
                 print(bert_model_evaluation['eval_f1-score'])
             else:
                 train_bert_model(df_train_all[i], os.path.join(model_dir, 'bert_train_level{}'.format(levels[i])),
-                                 values[levels[i]])
+                                 values[levels[i]], batch_size=batch_size)
 
     if run_svm:
         for i in range(num_levels):
@@ -159,6 +289,50 @@ def main(argv):
                           os.path.join(model_dir, 'svm/svm_train_level{}_vectorizer.json'.format(levels[i])),
                           os.path.join(model_dir, 'svm/svm_train_level{}_models.json'.format(levels[i])))
 
+            # prediction prefers the compressed models, so an outdated compression has to go
+            compressed_model_filepath = os.path.join(model_dir, 'svm/svm_train_level{}_models.npz'.format(levels[i]))
+            if compress:
+                print("===> SVM: Compressing Level %s..." % levels[i])
+                print(compress_svm(os.path.join(model_dir, 'svm/svm_train_level{}_vectorizer.json'.format(levels[i])),
+                                   os.path.join(model_dir, 'svm/svm_train_level{}_models.json'.format(levels[i])),
+                                   compressed_model_filepath, threshold=svm_threshold, top_k=svm_top_k,
+                                   dtype=svm_dtype))
+            elif os.path.exists(compressed_model_filepath):
+                os.remove(compressed_model_filepath)
+
+    if run_distill:
+        df_unlabelled = None
+        if unlabelled_filepath is not None:
+            df_unlabelled = load_arguments_from_tsv(unlabelled_filepath, default_usage='train')
+        for i in range(num_levels):
+            bert_dir = os.path.join(model_dir, 'bert_train_level{}'.format(levels[i]))
+            student_dir = os.path.join(model_dir, 'student_train_level{}'.format(levels[i]))
+            if not os.path.exists(bert_dir):
+                print('Missing saved Bert model for level "{}" to distill from'.format(levels[i]))
+                sys.exit(2)
+            print("===> Student: Distilling Level %s..." % levels[i])
+            train_student_model(df_train_all[i], bert_dir, student_dir, values[levels[i]],
+                                unlabelled_dataframe=df_unlabelled)
+            if validate:
+                print("Benchmark against Bert for Level %s:" % levels[i])
+                print(benchmark_student_model(df_valid_all[i], bert_dir, student_dir, values[levels[i]]))
+
+    if run_heads:
+        # the premises are encoded only once; unchanged arguments are reused from previous runs
+        print("===> Embeddings: Encoding new arguments...")
+        store = update_embedding_store(df_arguments, embedding_dir if embedding_dir is not None
+                                       else os.path.join(model_dir, 'embeddings'))
+        for i in range(num_levels):
+            print("===> Heads: Training Level %s..." % levels[i])
+            heads_file = os.path.join(heads_dir, 'heads_train_level{}.npz'.format(levels[i]))
+            if validate:
+                heads_f1_scores = train_linear_heads(df_train_all[i], store, values[levels[i]], heads_file,
+                                                     test_dataframe=df_valid_all[i])
+                print("F1-Scores for Level %s:" % levels[i])
+                print(heads_f1_scores)
+            else:
+                train_linear_heads(df_train_all[i], store, values[levels[i]], heads_file)
+
 
 if __name__ == '__main__':
     main(sys.argv[1:])
@@ -0,0 +1,116 @@
+import sys
+import getopt
+import os
+
+from components.setup import (load_values_from_json, load_arguments_from_tsv)
+from components.models import (available_cpus, tune_thread_config, save_thread_config)
+
+help_string = '\nUsage:  tune.py [OPTIONS]' \
+              '\n' \
+              '\nTime thread and batch size combinations for the BERT model on a sample of the arguments and save the' \
+              '\nfastest configuration for "--thread-config" of training.py and predict.py' \
+              '\n' \
+              '\nOptions:' \
+              '\n      --batch-sizes string Comma-separated list of batch sizes to try (default "8,16,32")' \
+              '\n  -d, --data-dir string    Directory with the argument files (default "/data/")' \
+              '\n  -h, --help               Display help text' \
+              '\n      --interop-threads int' \
+              '\n                           Number of torch inter-op threads to use and save (default unchanged)' \
+              '\n  -l, --level string       Taxonomy level of the BERT model to time (default "1")' \
+              '\n  -m, --model-dir string   Directory with the trained models (default "/models/")' \
+              '\n  -n, --num-samples int    Number of arguments to time each combination on (default 64)' \
+              '\n  -o, --output string      File to save the configuration to (default "/models/thread-config.json")' \
+              '\n  -t, --threads string     Comma-separated list of thread counts to try (default 1, the powers of two' \
+              '\n                           below the available CPUs, and the available CPUs)'
+
+
+def parse_positive_integers(arg, name):
+    """Parses a comma-separated list of positive integers, exiting with a message if it is malformed"""
+    try:
+        numbers = [int(number) for number in arg.split(',')]
+    except ValueError:
+        numbers = [0]
+    if min(numbers) < 1:
+        print('The %s have to be positive integers' % name)
+        sys.exit(2)
+    return numbers
+
+
+def main(argv):
+    # default values
+    batch_sizes = [8, 16, 32]
+    data_dir = '/data/'
+    inter_op_threads = None
+    level = "1"
+    model_dir = '/models/'
+    num_samples = 64
+    config_filepath = '/models/thread-config.json'
+    thread_counts = None
+
+    try:
+        opts, args = getopt.gnu_getopt(argv, "d:hl:m:n:o:t:", ["batch-sizes=", "data-dir=", "help", "interop-threads=",
+                                                               "level=", "model-dir=", "num-samples=", "output=",
+                                                               "threads="])
+    except getopt.GetoptError:
+        print(help_string)
+        sys.exit(2)
+    for opt, arg in opts:
+        if opt in ('-h', '--help'):
+            print(help_string)
+            sys.exit()
+        elif opt == '--batch-sizes':
+            batch_sizes = parse_positive_integers(arg, 'batch sizes')
+        elif opt in ('-d', '--data-dir'):
+            data_dir = arg
+        elif opt == '--interop-threads':
+            inter_op_threads = parse_positive_integers(arg, 'inter-op threads')[0]
+        elif opt in ('-l', '--level'):
+            level = arg
+        elif opt in ('-m', '--model-dir'):
+            model_dir = arg
+        elif opt in ('-n', '--num-samples'):
+            num_samples = parse_positive_integers(arg, 'number of samples')[0]
+        elif opt in ('-o', '--output'):
+            config_filepath = arg
+        elif opt in ('-t', '--threads'):
+            thread_counts = parse_positive_integers(arg, 'thread counts')
+
+    argument_filepath = os.path.join(data_dir, 'arguments.tsv')
+    values_filepath = os.path.join(data_dir, 'values.json')
+    if not os.path.isfile(argument_filepath):
+        print('The required file "arguments.tsv" is not present in the data directory')
+        sys.exit(2)
+    if not os.path.isfile(values_filepath):
+        print('The required file "values.json" is not present in the data directory')
+        sys.exit(2)
+
+    values = load_values_from_json(values_filepath)
+    if level not in values:
+        print('Missing attribute "{}" in value.json'.format(level))
+        sys.exit(2)
+
+    bert_dir = os.path.join(model_dir, 'bert_train_level{}'.format(level))
+    if not os.path.exists(bert_dir):
+        print('Missing saved Bert model for level "{}"'.format(level))
+        sys.exit(2)
+
+    df_arguments = load_arguments_from_tsv(argument_filepath)
+    if len(df_arguments) < 1:
+        print('There are no arguments in file "%s"' % argument_filepath)
+        sys.exit(2)
+
+    print("===> Tuning on %d arguments with %d available CPUs..."
+          % (min(num_samples, len(df_arguments)), available_cpus()))
+    best_config, results = tune_thread_config(df_arguments, bert_dir, values[level], thread_counts=thread_counts,
+                                              batch_sizes=batch_sizes, num_samples=num_samples,
+                                              inter_op_threads=inter_op_threads)
+    for result in results:
+        print(result)
+
+    print("===> Saving fastest configuration to %s..." % config_filepath)
+    print(best_config)
+    save_thread_config(best_config, config_filepath)
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])